@@ -1,5 +1,7 @@
 import os
+import hashlib
 from types import SimpleNamespace
+import faiss
 from autogen import AssistantAgent, UserProxyAgent
 from AutoGenClient import LlamaAutoGenClient
 from hybridRetrieval import HybridRetrieval
@@ -20,10 +22,10 @@ class RetrievalAgent(UserProxyAgent):
 
     def init(self, **kwargs):
         """
-        Here, we instantiate the HybridRetrieval object without a query.
+        Here, we attach the shared HybridRetrieval service (its indexes are loaded only once per process).
         
         """
-        self.retriever = HybridRetrieval(input_query=None)
+        self.retriever = HybridRetrieval.shared()
 
 
     def on_user_message(self, message):
@@ -33,11 +35,19 @@ class RetrievalAgent(UserProxyAgent):
         Returns:
             A dict with role="system" and content containing the joined chunks.
         """
-        self.retriever.query = message.content
-
         # Perform hybrid retrieval: retrieve top 5 semantic and top 3 BM25 matches
-        chunks = self.retriever.run(top_k_sem=5, top_k_bm25=3)
-        return {"role": "system", "content": "\n\n".join(chunks)}
+        chunks = self.retriever.run(message.content, top_k_sem=5, top_k_bm25=3)
+
+        # Drop repeated chunk texts (keeping first occurrence order) so the prompt carries no duplicates
+        seen = set()
+        unique = []
+        for chunk in chunks:
+            digest = hashlib.blake2b(chunk.encode("utf-8"), digest_size=8).digest()
+            if digest not in seen:
+                seen.add(digest)
+                unique.append(chunk)
+
+        return {"role": "system", "content": "\n\n".join(unique)}
 
     def retrieve(self, query):
 
@@ -62,21 +72,176 @@ class RetrievalAgent(UserProxyAgent):
 
     
 
+# Static prompt prefixes (system prompt + few-shot examples). They contain no interpolated
+# values, so every request for a mode starts with byte-identical text and the backend can
+# reuse the prefix's KV cache instead of prefilling it again.
+INTRO_PREFIX = """
+<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+You are a friendly, professional copywriter for Pre-Law. Write a engaging, formal Introduction section on the topic given by the user. Do not write the body or conclusion.          
+                        
+Write for a General Audience with little or no legal background:
+1. **Definition/Hook** (1–2 sentences): introduce the topic and hook the reader.
+2. **Overview** (1–2 sentences): explain what the article will cover in general terms.
+3. **How Pre-Law can help** (Exactly 1 sentence): a concise call-out of Pre-Law’s service (“At Pre-Law, …”). If “At Pre-Law…” already appears anywhere in the context above, do NOT repeat it-skip this step.
+                   
+Use plain English, avoid legal jargon. Do not use first-person singular (“I”, “my”).
+<|eot_id|>
+<|start_header_id|>user<|end_header_id|>
+Topic: Settlement Agreements
+<|eot_id|>
+<|start_header_id|>assistant<|end_header_id|>
+
+**Introduction**
+
+Settlement agreements are often used when an employment relationship is coming to an end - whether through redundancy, a negotiated exit, or a workplace dispute. 
+If you’re leaving your job and have been presented with a settlement agreement, it’s important to understand what it is, what it means and what you are agreeing to.
+
+At Pre-Law, we provide clear, fixed-fee legal advice to help you understand the terms of your settlement agreement, protect your rights, and move forward.
+<|eot_id|>
+<|start_header_id|>user<|end_header_id|>
+"""
+
+ARTICLE_PREFIX = """
+
+                        <|begin_of_text|><|start_header_id|>system<|end_header_id|>
+                        You are a well-polished, engaging article writer for a UK solicitor firm called Pre-Law."""
+
+COMPANY_PREFIX = """
+<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+You are a friendly, professional copywriter for Pre-Law. write a brief “How Pre-Law Can Help” section:
+- Start with this heading **How Pre-Law Can Help**
+- Use clear, supportive language
+- Describe 2–3 core services or benefits
+- End with a call to action including phone, email, and online enquiry form
+<|eot_id|>
+<|start_header_id|>user<|end_header_id|>
+Topic: Settlement Agreements and Redundancy
+Phone: 01524 907100
+Email: info@pre-law.co.uk
+<|eot_id|>
+<|start_header_id|>assistant<|end_header_id|>
+**How Pre-law Can Help**
+                            
+Whether you’re being made redundant, considering a severance package, or have been offered a settlement agreement -we’re here to support you.
+
+We’ll explain your rights, review the terms, and, if necessary, help you negotiate the best outcome for your situation.
+
+For more information, contact us on 01524 907100, email info@pre-law.co.uk or fill out our online enquiry form.
+<|eot_id|>
+<|start_header_id|>user<|end_header_id|>
+"""
+
+
+# Full prompt templates: a static prefix followed by the request-specific part.
+# Only the selected template is filled in (str.format_map) for each request.
+INTRO_TEMPLATE = INTRO_PREFIX + """Topic: {topic}
+<|eot_id|>
+<|start_header_id|>assistant<|end_header_id|>
+
+                        """
+
+ARTICLE_TEMPLATE = ARTICLE_PREFIX + """ Do not write more than {max_subsections} subsections.
+                        
+                        Write for a General Public with no legal background:
+                        - Paraphrase and use plain English, translate any legal terminology into everyday language.
+                        - Avoid legal jargon or citations of case law; if you must mention a legal term, define it immediately in simple words.
+                        - Don't repeat phrases.
+                        - Don't use first-person singular (“I”, “my”).
+                        - Don’t introduce any new legal facts or cases beyond what’s given.
+                        - Ensure what you write is accurate. 
+                        
+                        Use subheadings to ensure a clean article structure.
+                        <|eot_id|>
+                        <|start_header_id|>user<|end_header_id|>
+                        Here is some legal information on “{topic}”:
+
+                        {formatted_data}
+
+                        -----
+                        In accordance with English law as of May 2025, write an engaging, clear, informative article about “{topic}” using only the legal information provided. Mention every fact in the legal information.  Make sure to:
+                        1. Give the article a Title  
+                        2. Include an introduction (2-3 sentences) that:  
+                           - Hook the reader with a conversational first sentence. 
+                           - speaks in generalities about the topic (e.g. “{topic} encompasses several key aspects…”),  
+                           - does not enumerate the specific items you’ll list below.  
+                        3. Include a simple, well structured Article body:
+                            - Use bullet points where needed to list items.
+                            - Do not write more than {max_subsections} subsections.
+                            - Don't go into extensive detail.
+                        4. Definitely include a Conclusion (1-2 sentences):
+                            - Sub-heading: `**Conclusion**`  
+                            - A short wrap-up sentence that ends with a period, **and** includes an “At Pre-Law…” statement connecting your firm to the topic (e.g. “At Pre-Law, we ensure that…”).  
+
+                        <|eot_id|>
+                        <|start_header_id|>assistant<|end_header_id|>
+                        
+                        """
+
+COMPANY_TEMPLATE = COMPANY_PREFIX + """Topic: {topic}
+Phone: 01524 907100
+Email: info@pre-law.co.uk
+<|eot_id|>
+<|start_header_id|>assistant<|end_header_id|>
+
+                             """
+
+# mode -> (static prefix, full template); any other mode writes a full article
+PROMPT_TEMPLATES = {
+    "Write Intro": (INTRO_PREFIX, INTRO_TEMPLATE),
+    "Write Pre-Law statement": (COMPANY_PREFIX, COMPANY_TEMPLATE),
+}
+
+
+def _format_line(stripped):
+
+    """
+    Format one stripped line of extracted data for the prompt.
+    Subsection headings become a blank-line-separated "<heading>:" line, first-level
+    bullets (•) are indented by two spaces, nested bullets (*) by five, and any other
+    line is prefixed with a dash.
+    """
+
+    if stripped.startswith("Subsection:"):
+        return "\n\n" + stripped.split(":", 1)[1].strip() + ":\n"
+
+    # List item at first level: indent with two spaces
+    if stripped.startswith("•"):
+        return "  " + stripped + "\n"
+
+    # Nested list item: indent with five spaces
+    if stripped.startswith("*"):
+        return "     " + stripped + "\n"
+
+    # Regular line: prefix with a dash
+    return "- " + stripped + "\n"
+
+
 class ContentAgent(AssistantAgent):
     """
     An agent responsible for generating content (e.g., introductions or statements)
     Inherits from AssistantAgent to respond to system/user messages.
     """
-    def __init__(self, name="content_agent"):
+    # Minimum cosine similarity for a previous response to be reused for a new request
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+
+    def __init__(self, name="content_agent", embedder=None):
         super().__init__(name=name, code_execution_config=False)
         self.client = None   #  LlamaAutoGenClient instance
         self.extracted_data = None   # Stores the retrieved text chunks
+        self._formatted_data = None   # extracted_data run through _format_line, built once per snippets
+        self._snippets_digest = None  # blake2b of the snippets last passed to set_snippets
+
+        # Optional LegalKnowledgeIndexer (anything with .embed(list_of_texts)) used for fuzzy cache hits
+        self.embedder = embedder
+        self._resp_cache = {}      # blake2b key of the request -> generated text
+        self._sem_cache = {}       # _semantic_key() -> (FAISS IndexFlatIP over topic embeddings, list of cache keys)
 
         self.topic = ""
         self.max_subsections = 3   #Maximum subsections to consider
         self.mode = "Write Intro"  #Mode of generation
 
         self.output = ""        # Stores the generated output text
+        self._last_request = None   # (cache key, embedding) of the last generated request, for continuations
 
 
         
@@ -85,7 +250,7 @@ class ContentAgent(AssistantAgent):
         """
         Configure the generation parameters based on the mode, topic, and max_subsections.
 
-        Initializes a LlamaAutoGenClient with appropriate settings.
+        Fetches a (cached) LlamaAutoGenClient with appropriate settings.
         """
         
         self.mode = mode
@@ -103,12 +268,13 @@ class ContentAgent(AssistantAgent):
             tokens, temp = 480, 0.7
 
 
-        self.client = LlamaAutoGenClient(
-            model_path="./Llama-3.2-1B",
-            hf_token="",
+        # Reuse the client built for these settings on a previous call, if any
+        self.client = LlamaAutoGenClient.get(
             max_new_tokens = tokens,
             temperature=temp,
             do_sample=True,
+            model_path="./Llama-3.2-1B",
+            hf_token="",
         )
 
 
@@ -124,11 +290,33 @@ class ContentAgent(AssistantAgent):
         full = message.content
         parts = full.split("\n\n") 
         self.extracted_data =  parts[0].strip() if len(parts) > 1 else full
+
+        # New data: the formatted copy is rebuilt on the next prompt
+        self._formatted_data = None
+        self._snippets_digest = None
+
+
+    def set_snippets(self, snippets):
+
+        """
+        Hand the confirmed snippets to the agent for the next generations. Sending the same
+        snippets again is a no-op, so their formatted prompt text is reused.
+
+        Args:
+            snippets (str): The confirmed retrieval results, joined into one string.
+        """
+
+        digest = hashlib.blake2b(snippets.encode("utf-8"), digest_size=16).digest()
+        if digest == self._snippets_digest:
+            return
+
+        self.on_system_message(SimpleNamespace(content=snippets))
+        self._snippets_digest = digest
         
 
     def on_user_message(self, message):
 
-         """
+        """
         Callback when the user sends a message to the ContentAgent.
 
         Args:
@@ -137,159 +325,192 @@ class ContentAgent(AssistantAgent):
             dict: {"role": "assistant", "content": generated_text}
         """
 
-        lines = self.extracted_data.splitlines()
-        formatted_parts = []
-        
-        for line in lines:
+        # A new request: continue_generation must not store its output under an earlier request's key
+        self._last_request = None
+
+        # Return a previous response for the same (or a near-identical) request without calling the model
+        key, query_emb, cached = self._lookup_cache()
+        if cached is not None:
+            self.output = cached
+            return {"role": "assistant", "content": self.output}
+
+        # Call the LlamaAutoGenClient to generate the desired content (the static prefix is cached)
+        prefix, prompt = self._build_prompt()
+        self.output = self.client.chat(prompt, prefix=prefix)
+
+        self._store_response(key, query_emb)
+        return {"role": "assistant", "content": self.output}
+
+
+    def stream_user_message(self, message):
+
+        """
+        Streaming variant of on_user_message: yield the generated text in pieces as the model
+        decodes it. When the generator is exhausted, self.output holds the full response.
+
+        Args:
+            message: A dict-like object with a 'content' attribute (not used directly here).
+        Yields:
+            str: The next piece of generated text (a cached response is yielded in one piece).
+        """
+
+        # A new request: continue_generation must not store its output under an earlier request's key
+        self._last_request = None
+
+        key, query_emb, cached = self._lookup_cache()
+        if cached is not None:
+            self.output = cached
+            yield cached
+            return
 
-            stripped = line.strip()
+        prefix, prompt = self._build_prompt()
+        pieces = []
+        for piece in self.client.stream_chat(prompt, prefix=prefix):
+            pieces.append(piece)
+            yield piece
+        self.output = "".join(pieces)
 
-            if stripped.startswith("Subsection:"):
+        self._last_request = (key, query_emb)
+        self._store_response(key, query_emb)
+
+
+    def continue_generation(self, max_new_tokens=20):
+
+        """
+        Extend an answer that stopped before its final period by decoding a few more tokens,
+        instead of generating the whole answer again. The new text is cut after its first period.
+
+        Args:
+            max_new_tokens (int): Most tokens to decode for this continuation.
+        Returns:
+            str: The text appended to self.output (empty if the model produced nothing).
+        """
+
+        prefix, prompt = self._build_prompt()
+        extra = self.client.continue_chat(prompt, self.output, prefix=prefix, max_new_tokens=max_new_tokens)
+
+        period = extra.find(".")
+        if period != -1:
+            extra = extra[:period + 1]
+        self.output += extra
+
+        # A continuation that completes the answer makes it cacheable
+        if self._last_request is not None:
+            self._store_response(*self._last_request)
+        return extra
+
+
+    def _lookup_cache(self):
+
+        """
+        Look the current request up in the exact and semantic response caches.
+        Returns:
+            tuple: (cache key, topic embedding or None, cached response or None)
+        """
 
-                heading = stripped.split(":", 1)[1].strip()+ ":"
-                formatted_parts.append("\n\n") 
-                formatted_parts.append(heading)
-                formatted_parts.append("\n")
-                continue
+        key = self._cache_key()
+        cached = self._resp_cache.get(key)
+        query_emb = None
+        if cached is None and self.embedder is not None:
+            # Only the topic is compared by similarity; everything else must match exactly (see _semantic_key)
+            query_emb = self.embedder.embed([self.topic])
+            cached = self._semantic_lookup(query_emb)
+        return key, query_emb, cached
 
-            # List item at first level: indent with two spaces
-            if stripped.startswith("•"):
-                formatted_parts.append(f"  {stripped}")
-                formatted_parts.append("\n")
 
-            # Nested list item: indent with five spaces
-            elif stripped.startswith("*"):
-                formatted_parts.append(f"     {stripped}")
-                formatted_parts.append("\n")
+    def _build_prompt(self):
 
-            # Regular line: prefix with a dash
-            else:
-                formatted_parts.append(f"- {stripped}")
-                formatted_parts.append("\n")
+        """Format the extracted data and fill in the mode's template. Returns (static_prefix, full_prompt)."""
 
-        # Join all formatted parts into one prompt-ready string
-        formatted_data = "".join(formatted_parts)
+        # Format every line and join them into one prompt-ready string (once per snippets)
+        if self._formatted_data is None:
+            self._formatted_data = "".join(_format_line(line.strip()) for line in self.extracted_data.splitlines())
 
         #wrap formatted_data into the final instruction
-        prompt = self.prompt_templates(formatted_data)
+        return self.prompt_templates(self._formatted_data)
 
-        # Call the LlamaAutoGenClient to generate the desired content
-        self.output = self.client.chat(prompt)
 
-        return {"role": "assistant", "content": self.output}
-    
+    def _store_response(self, key, query_emb):
 
+        """Cache self.output under `key` (and its embedding), if it is a complete answer."""
 
-    #holds the 3 different types of prompts depending on the user's chosen mode
-    def prompt_templates(self, formatted_data):
+        # Only cache complete answers; a truncated one is cached once continue_generation completes it
+        if self.output.strip().endswith("."):
+            self._resp_cache[key] = self.output
+            if query_emb is not None:
+                self._semantic_add(query_emb, key)
 
-        intro_prompt = f"""
-<|begin_of_text|><|start_header_id|>system<|end_header_id|>
-You are a friendly, professional copywriter for Pre-Law. Write a engaging, formal Introduction section on '{self.topic}'. Do not write the body or conclusion.          
-                        
-Write for a General Audience with little or no legal background:
-1. **Definition/Hook** (1–2 sentences): introduce the topic and hook the reader.
-2. **Overview** (1–2 sentences): explain what the article will cover in general terms.
-3. **How Pre-Law can help** (Exactly 1 sentence): a concise call-out of Pre-Law’s service (“At Pre-Law, …”). If “At Pre-Law…” already appears anywhere in the context above, do NOT repeat it-skip this step.
-                   
-Use plain English, avoid legal jargon. Do not use first-person singular (“I”, “my”).
-<|eot_id|>
-<|start_header_id|>user<|end_header_id|>
-Topic: Settlement Agreements
-<|eot_id|>
-<|start_header_id|>assistant<|end_header_id|>
 
-**Introduction**
+    def _cache_key(self):
 
-Settlement agreements are often used when an employment relationship is coming to an end - whether through redundancy, a negotiated exit, or a workplace dispute. 
-If you’re leaving your job and have been presented with a settlement agreement, it’s important to understand what it is, what it means and what you are agreeing to.
+        """
+        Hash everything that determines the generated text: mode, topic, subsection limit,
+        the client's generation settings and the extracted data. A change to any of them
+        (including new settings from set_generation_params) produces a different key.
+        """
 
-At Pre-Law, we provide clear, fixed-fee legal advice to help you understand the terms of your settlement agreement, protect your rights, and move forward.
-<|eot_id|>
-<|start_header_id|>user<|end_header_id|>
-Topic: {self.topic}
-<|eot_id|>
-<|start_header_id|>assistant<|end_header_id|>
+        parts = (
+            self.mode,
+            self.topic,
+            str(self.max_subsections),
+            str(self.client.max_new_tokens),
+            str(self.client.temperature),
+            self.extracted_data,
+        )
+        return hashlib.blake2b("\x1f".join(parts).encode("utf-8")).hexdigest()
 
-                        """
 
+    def _semantic_key(self):
+
+        """
+        Everything except the topic that determines the generated text: mode, subsection limit,
+        the client's generation settings and a digest of the extracted data. Semantic hits are
+        only looked for among responses generated with exactly these.
+        """
 
-        article_prompt = f"""
+        data_digest = hashlib.blake2b((self.extracted_data or "").encode("utf-8"), digest_size=16).digest()
+        return (self.mode, self.max_subsections, self.client.max_new_tokens, self.client.temperature, data_digest)
 
-                        <|begin_of_text|><|start_header_id|>system<|end_header_id|>
-                        You are a well-polished, engaging article writer for a UK solicitor firm called Pre-Law. Do not write more than {self.max_subsections} subsections.
-                        
-                        Write for a General Public with no legal background:
-                        - Paraphrase and use plain English, translate any legal terminology into everyday language.
-                        - Avoid legal jargon or citations of case law; if you must mention a legal term, define it immediately in simple words.
-                        - Don't repeat phrases.
-                        - Don't use first-person singular (“I”, “my”).
-                        - Don’t introduce any new legal facts or cases beyond what’s given.
-                        - Ensure what you write is accurate. 
-                        
-                        Use subheadings to ensure a clean article structure.
-                        <|eot_id|>
-                        <|start_header_id|>user<|end_header_id|>
-                        Here is some legal information on “{self.topic}”:
 
-                        {formatted_data}
+    def _semantic_lookup(self, query_emb):
 
-                        -----
-                        In accordance with English law as of May 2025, write an engaging, clear, informative article about “{self.topic}” using only the legal information provided. Mention every fact in the legal information.  Make sure to:
-                        1. Give the article a Title  
-                        2. Include an introduction (2-3 sentences) that:  
-                           - Hook the reader with a conversational first sentence. 
-                           - speaks in generalities about the topic (e.g. “{self.topic} encompasses several key aspects…”),  
-                           - does not enumerate the specific items you’ll list below.  
-                        3. Include a simple, well structured Article body:
-                            - Use bullet points where needed to list items.
-                            - Do not write more than {self.max_subsections} subsections.
-                            - Don't go into extensive detail.
-                        4. Definitely include a Conclusion (1-2 sentences):
-                            - Sub-heading: `**Conclusion**`  
-                            - A short wrap-up sentence that ends with a period, **and** includes an “At Pre-Law…” statement connecting your firm to the topic (e.g. “At Pre-Law, we ensure that…”).  
+        """
+        Return the cached response whose topic embedding is closest to `query_emb` (among responses
+        with the same _semantic_key), if its cosine similarity reaches SEMANTIC_CACHE_THRESHOLD.
+        """
 
-                        <|eot_id|>
-                        <|start_header_id|>assistant<|end_header_id|>
-                        
-                        """
+        entry = self._sem_cache.get(self._semantic_key())
+        if entry is None:
+            return None
+        index, keys = entry
+        D, I = index.search(query_emb, 1)
+        if I[0][0] < 0 or D[0][0] < self.SEMANTIC_CACHE_THRESHOLD:
+            return None
+        return self._resp_cache.get(keys[I[0][0]])
 
-        company_prompt = f"""
-<|begin_of_text|><|start_header_id|>system<|end_header_id|>
-You are a friendly, professional copywriter for Pre-Law. write a brief “How Pre-Law Can Help” section:
-- Start with this heading **How Pre-Law Can Help**
-- Use clear, supportive language
-- Describe 2–3 core services or benefits
-- End with a call to action including phone, email, and online enquiry form
-<|eot_id|>
-<|start_header_id|>user<|end_header_id|>
-Topic: Settlement Agreements and Redundancy
-Phone: 01524 907100
-Email: info@pre-law.co.uk
-<|eot_id|>
-<|start_header_id|>assistant<|end_header_id|>
-**How Pre-law Can Help**
-                            
-Whether you’re being made redundant, considering a severance package, or have been offered a settlement agreement -we’re here to support you.
 
-We’ll explain your rights, review the terms, and, if necessary, help you negotiate the best outcome for your situation.
+    def _semantic_add(self, query_emb, key):
 
-For more information, contact us on 01524 907100, email info@pre-law.co.uk or fill out our online enquiry form.
-<|eot_id|>
-<|start_header_id|>user<|end_header_id|>
-Topic: {self.topic}
-Phone: 01524 907100
-Email: info@pre-law.co.uk
-<|eot_id|>
-<|start_header_id|>assistant<|end_header_id|>
+        """Index a newly cached response under its topic embedding."""
 
-                             """
+        sem_key = self._semantic_key()
+        if sem_key not in self._sem_cache:
+            self._sem_cache[sem_key] = (faiss.IndexFlatIP(query_emb.shape[1]), [])
+        index, keys = self._sem_cache[sem_key]
+        index.add(query_emb)
+        keys.append(key)
+    
 
 
-        if self.mode == 'Write Intro':
-            return intro_prompt
-        elif self.mode == 'Write Pre-Law statement':
-            return company_prompt
-        else:
-            return article_prompt
+    #picks one of the 3 different types of prompts depending on the user's chosen mode
+    #returns (static_prefix, full_prompt); full_prompt always starts with static_prefix
+    def prompt_templates(self, formatted_data):
+
+        prefix, template = PROMPT_TEMPLATES.get(self.mode, (ARTICLE_PREFIX, ARTICLE_TEMPLATE))
+        prompt = template.format_map({
+            "topic": self.topic,
+            "max_subsections": self.max_subsections,
+            "formatted_data": formatted_data,
+        })
+        return prefix, prompt
         
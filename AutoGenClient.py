@@ -1,10 +1,31 @@
+import copy
 import getpass
-from typing import Optional
+import threading
+from typing import Iterator, Optional
 
+import torch
 from huggingface_hub import login
-from langchain_core.messages import HumanMessage
-from langchain_huggingface import ChatHuggingFace, HuggingFacePipeline
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline as hf_pipeline
+from transformers import AutoTokenizer, AutoModelForCausalLM, TextIteratorStreamer
+
+try:
+    from vllm import LLM, SamplingParams
+except ImportError:   # vLLM is optional: fall back to transformers generate()
+    LLM = None
+    SamplingParams = None
+
+
+# Set once the process has authenticated to Hugging Face
+_hf_logged_in = False
+
+
+def _hf_login(hf_token: Optional[str]) -> None:
+    """Authenticate to Hugging Face once per process."""
+    global _hf_logged_in
+    if _hf_logged_in:
+        return
+    token = hf_token or getpass.getpass("Hugging Face token: ")
+    login(token=token)
+    _hf_logged_in = True
 
 
 class LlamaAutoGenClient:
@@ -13,6 +34,38 @@ class LlamaAutoGenClient:
     _tokenizer = None
     _model = None
 
+    # Shared vLLM engine (one per process: it reserves most of the GPU memory)
+    _engine = None
+
+    # transformers backend: prefix text -> (prefix token ids, past_key_values after the prefix)
+    _prefix_kv: dict = {}
+
+    # Clients keyed by (model_path, max_new_tokens, temperature, do_sample)
+    _pipeline_cache: dict = {}
+
+    @classmethod
+    def get(
+        cls,
+        max_new_tokens: int = 512,
+        temperature: float = 0.2,
+        do_sample: bool = True,
+        model_path: str = "./Llama-3.2-1B",
+        hf_token: Optional[str] = None,
+    ) -> "LlamaAutoGenClient":
+        """Return a cached client for these generation settings, building it on first use."""
+        key = (model_path, max_new_tokens, temperature, do_sample)
+        client = cls._pipeline_cache.get(key)
+        if client is None:
+            client = cls(
+                model_path=model_path,
+                hf_token=hf_token,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature,
+                do_sample=do_sample,
+            )
+            cls._pipeline_cache[key] = client
+        return client
+
     def __init__(
         self,
         model_path: str = "./Llama-3.2-1B",
@@ -22,43 +75,194 @@ class LlamaAutoGenClient:
         do_sample: bool = True,
     ):
 
-        # 1. Authenticate to Hugging Face
-        token = hf_token or getpass.getpass("Hugging Face token: ")
-        login(token=token)
+        # 1. Authenticate to Hugging Face (only the first client in the process does this)
+        _hf_login(hf_token)
+
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.do_sample = do_sample
+
+        # transformers backend: (decoded text, token ids, past_key_values) of the last generation if it
+        # stopped mid-sentence, so continue_chat can extend it without prefilling the prompt again
+        self._last = None
+
+        # 2. Prefer vLLM on a GPU: paged attention and automatic prefix caching across requests
+        self.engine = None
+        if LLM is not None and torch.cuda.is_available():
+            if LlamaAutoGenClient._engine is None:
+                LlamaAutoGenClient._engine = LLM(
+                    model=model_path,
+                    dtype="float16",
+                    gpu_memory_utilization=0.85,
+                    enable_prefix_caching=True,
+                )
+            self.engine = LlamaAutoGenClient._engine
+            self.sampling_params = SamplingParams(
+                max_tokens=max_new_tokens,
+                temperature=temperature if do_sample else 0.0,
+            )
+
+        else:
+            self._init_hf_model(model_path)
+
+
+    def _init_hf_model(self, model_path: str) -> None:
+        """Load the shared transformers tokenizer and model (used when vLLM is unavailable)."""
 
         if LlamaAutoGenClient._tokenizer is None:
-            # 2a. Load tokenizer and model from local folder
+            # 3. Load tokenizer and model from local folder
             LlamaAutoGenClient._tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
-            LlamaAutoGenClient._model = AutoModelForCausalLM.from_pretrained(model_path, local_files_only=True)    
-            
-        
-        # 2b. Build a transformers text-generation pipeline
-        transformers_pipe = hf_pipeline(
-            "text-generation",
-            model=LlamaAutoGenClient._model,
-            tokenizer=LlamaAutoGenClient._tokenizer,
-            max_new_tokens=max_new_tokens,
-            temperature=temperature,
-            do_sample=do_sample,
-            return_full_text=False,
-            device=-1,
-        )
-        
-        # 2c. Wrap in LangChain's HuggingFacePipeline
-        self.pipeline = HuggingFacePipeline(pipeline=transformers_pipe)
-        # 2d. Wrap that in ChatHuggingFace
-        self.llm = ChatHuggingFace(llm=self.pipeline, model_id=model_path)
-       
-    
-
-    def chat(self, prompt: str) -> str:
-        """Invoke the model directly—no agents, no feedback loop."""
-        # We wrap your prompt in a single HumanMessage
-        out = self.llm.invoke([HumanMessage(content=prompt)])
-        reply = out.content
-        return reply
-
-
-
-
-    
+
+            if torch.cuda.is_available():
+                # Half precision on the GPU: half the memory traffic per token and tensor-core matmuls
+                LlamaAutoGenClient._model = AutoModelForCausalLM.from_pretrained(
+                    model_path,
+                    torch_dtype=torch.float16,
+                    device_map="cuda:0",
+                    local_files_only=True,
+                )
+            else:
+                LlamaAutoGenClient._model = AutoModelForCausalLM.from_pretrained(model_path, local_files_only=True)
+
+
+    def _cached_prefix(self, prefix: str):
+        """Return (token ids, KV cache) for a static prompt prefix, running the prefill only once."""
+        cached = LlamaAutoGenClient._prefix_kv.get(prefix)
+        if cached is None:
+            model = LlamaAutoGenClient._model
+            ids = LlamaAutoGenClient._tokenizer(prefix, return_tensors="pt").input_ids.to(model.device)
+            with torch.inference_mode():
+                past = model(ids, use_cache=True).past_key_values
+            cached = (ids, past)
+            LlamaAutoGenClient._prefix_kv[prefix] = cached
+        return cached
+
+
+    def _generate(self, input_ids, past_key_values=None, streamer=None, max_new_tokens: Optional[int] = None) -> str:
+        """Run model.generate on already-tokenized input and decode only the newly generated tokens."""
+        tokenizer = LlamaAutoGenClient._tokenizer
+        with torch.inference_mode():
+            out = LlamaAutoGenClient._model.generate(
+                input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=past_key_values,
+                max_new_tokens=max_new_tokens or self.max_new_tokens,
+                temperature=self.temperature,
+                do_sample=self.do_sample,
+                use_cache=True,
+                pad_token_id=tokenizer.eos_token_id,
+                streamer=streamer,
+                return_dict_in_generate=True,
+            )
+        text = tokenizer.decode(out.sequences[0, input_ids.shape[1]:], skip_special_tokens=True)
+
+        # Keep the sequence and its KV cache only when continue_chat may need them (the answer stopped
+        # before a final period); otherwise the full-length cache would stay allocated on this cached client
+        if text.rstrip().endswith("."):
+            self._last = None
+        else:
+            self._last = (text, out.sequences, out.past_key_values)
+        return text
+
+
+    def _prepare_inputs(self, prompt: str, prefix: str = ""):
+        """
+        Tokenize `prompt` for the transformers backend. Returns (input_ids, past_key_values);
+        when the prompt starts with `prefix`, only the suffix is new and the prefix KV comes from the cache.
+        """
+        tokenizer = LlamaAutoGenClient._tokenizer
+        model = LlamaAutoGenClient._model
+
+        if prefix and prompt.startswith(prefix) and len(prompt) > len(prefix):
+            prefix_ids, prefix_kv = self._cached_prefix(prefix)
+            suffix_ids = tokenizer(prompt[len(prefix):], add_special_tokens=False, return_tensors="pt").input_ids.to(model.device)
+
+            # generate() extends the cache in place, so hand it a copy and keep the prefix KV pristine
+            return torch.cat([prefix_ids, suffix_ids], dim=1), copy.deepcopy(prefix_kv)
+
+        # Otherwise tokenize the whole prompt
+        return tokenizer(prompt, return_tensors="pt").input_ids.to(model.device), None
+
+
+    def chat(self, prompt: str, prefix: str = "") -> str:
+        """
+        Invoke the model directly—no agents, no feedback loop.
+        `prefix` is an optional static start of `prompt` (system prompt / few-shot examples)
+        whose KV cache is computed once and reused across calls.
+        """
+        self._last = None   # a new request: the previous generation can no longer be continued
+        if self.engine is not None:
+            # vLLM takes the raw prompt; identical prompt prefixes reuse their cached KV blocks
+            outputs = self.engine.generate([prompt], self.sampling_params)
+            return outputs[0].outputs[0].text
+
+        input_ids, past_key_values = self._prepare_inputs(prompt, prefix)
+        return self._generate(input_ids, past_key_values=past_key_values)
+
+
+    def stream_chat(self, prompt: str, prefix: str = "") -> Iterator[str]:
+        """
+        Like chat(), but yield the generated text in pieces as it is decoded.
+        The offline vLLM engine only returns finished completions, so it yields one piece.
+        """
+        self._last = None   # a new request: the previous generation can no longer be continued
+        if self.engine is not None:
+            yield self.chat(prompt, prefix)
+            return
+
+        input_ids, past_key_values = self._prepare_inputs(prompt, prefix)
+        streamer = TextIteratorStreamer(LlamaAutoGenClient._tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        # generate() pushes decoded text into the streamer from a background thread
+        errors = []
+
+        def run():
+            try:
+                self._generate(input_ids, past_key_values=past_key_values, streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()   # unblock the consumer below
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        yield from streamer
+        thread.join()
+
+        if errors:
+            raise errors[0]
+
+
+    def continue_chat(self, prompt: str, generated: str, prefix: str = "", max_new_tokens: int = 20) -> str:
+        """
+        Decode up to `max_new_tokens` more tokens after `prompt` + `generated` and return only the new text.
+        When `generated` is the last output of this client, the transformers backend resumes from that
+        generation's KV cache; vLLM reuses the cached KV blocks of the identical prompt prefix.
+        """
+        if self.engine is not None:
+            params = SamplingParams(
+                max_tokens=max_new_tokens,
+                temperature=self.temperature if self.do_sample else 0.0,
+                stop=["."],   # a continuation only needs to finish the sentence
+                include_stop_str_in_output=True,
+            )
+            outputs = self.engine.generate([prompt + generated], params)
+            return outputs[0].outputs[0].text
+
+        # The stored generation is used at most once
+        last, self._last = self._last, None
+        if last is not None and last[0] == generated:
+            # Every token so far is already in the cache; only the new tokens are decoded
+            _, input_ids, past_key_values = last
+        else:
+            input_ids, past_key_values = self._prepare_inputs(prompt + generated, prefix)
+
+        text = self._generate(input_ids, past_key_values=past_key_values, max_new_tokens=max_new_tokens)
+
+        if self._last is not None:
+            if "." in text:
+                # The caller cuts the continuation at its first period, so nothing will resume from here
+                self._last = None
+            else:
+                # Still mid-sentence: the next continue_chat gets the whole answer so far as `generated`
+                self._last = (generated + text,) + self._last[1:]
+        return text
@@ -2,8 +2,48 @@ import os
 import json
 import re
 import unicodedata
-from collections import defaultdict
+from collections import defaultdict, Counter
 import math
+import pickle
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:   # Numba is optional: score_subset falls back to the NumPy path
+    njit = None
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _bm25_score(doc_ids_concat, freqs_concat, offsets, idf_num, norm_dl, cand_mask, k1, scores, touched):
+
+        """
+        Accumulate BM25 scores for all query terms in one fused pass.
+        The postings of term t live in doc_ids_concat/freqs_concat[offsets[t]:offsets[t + 1]].
+        Terms are walked serially because different terms may update the same document.
+        """
+
+        for t in range(len(idf_num)):
+            w = idf_num[t]
+            for p in range(offsets[t], offsets[t + 1]):
+                doc_id = doc_ids_concat[p]
+                if cand_mask[doc_id] == 0:
+                    continue
+                freq = freqs_concat[p]
+                scores[doc_id] += w * freq / (freq + k1 * norm_dl[doc_id])
+                touched[doc_id] = True
+
+else:
+    _bm25_score = None
+
+
+# Version of the on-disk BM25 cache. Bump it whenever flatten_content, normalize,
+# strip_section_lines or the cached structures change, so older caches are rebuilt
+BM25_CACHE_VERSION = 1
+
 
 class BM25Preprocessor:
 
@@ -11,14 +51,23 @@ class BM25Preprocessor:
     Preprocess a directory of JSON files (each containing document “chunks”) to build
     the data structures needed for BM25 scoring:
      - raw_chunks: original unnormalized text of each chunk
+     - clean_chunks: raw chunk without its leading "Section:" lines, as returned to callers
+     - corpus_digest: hex digest of all clean_chunks, identifying the prepared corpus
      - normalised_chunks: token‐lowercased, punctuation‐stripped text
      - df: document frequency of each term across all chunks
      - postings: term → { doc_id: term_frequency_in_that_doc, … }
      - idf: inverse document frequency per term
-     - doc_len: list of token counts for each chunk
+     - idf_num: idf * (k1 + 1) per term, the constant part of the BM25 numerator
+     - doc_len: int32 NumPy array of token counts for each chunk
      - avgdl: average document length across all chunks
+     - p_docs / p_freqs: postings stored as parallel NumPy arrays (doc ids, term frequencies) per term
+     - norm_dl: per-document BM25 length normalisation, (1 - b) + b * doc_len / avgdl
     """
 
+    # Normalisation patterns, compiled once for all instances
+    _POSSESSIVE = re.compile(r"\b(\w+)'s\b")
+    _PUNCT = re.compile(r"[^\w\s]+")
+
     def __init__(self, json_dir, k1=1.5, b=0.75):
 
         self.json_dir = json_dir
@@ -26,14 +75,21 @@ class BM25Preprocessor:
         self.b = b
         
         self.raw_chunks = []                 # orginal text chunks
+        self.clean_chunks = []               # text chunks with the leading "Section:" lines removed
+        self.corpus_digest = ""              # digest of clean_chunks (changes whenever the returned text can)
         self.normalised_chunks = []          # processed text chunks
 
         self.N = 0                           # total number of documents
         self.avgdl = 0                       # average document length (mean number of tokens per chunk)
-        self.doc_len = []                    # each entry is the length of the corresponding normalised chunk
+        self.doc_len = np.zeros(0, dtype=np.int32)  # each entry is the length of the corresponding normalised chunk
         self.df = defaultdict(int)           # document frequency per term
         self.postings = defaultdict(dict)    # mapping of term-frequency for that term
         self.idf = {}                        # inverse document frequency
+        self.idf_num = {}                    # BM25 numerator constant per term: idf * (k1 + 1)
+
+        self.p_docs = {}                     # term -> int32 array of doc ids containing the term
+        self.p_freqs = {}                    # term -> float32 array of term frequencies (aligned with p_docs)
+        self.norm_dl = np.zeros(0, dtype=np.float32)  # length normalisation per document
 
 
     def flatten_content(self, entry):
@@ -71,14 +127,24 @@ class BM25Preprocessor:
     def process_list(self, items, depth, lines):
 
         """
-        Recursively traverse a nested list of items and append their text lines to `lines`.
+        Traverse a nested list of items depth-first and append their text lines to `lines`.
+        Uses an explicit stack of (iterator, depth) pairs instead of recursion, so deep
+        nesting costs no Python call frames; items are still emitted in document order.
         Args:
             items (list of dict): Each dict has "text" (str) and optional "list" (list of items).
             depth (int): Current nesting depth (0 for top-level list).
             lines (list of str): Accumulator list for the flattened text lines.
         """
 
-        for item in items:
+        stack = [(iter(items), depth)]
+        while stack:
+            it, depth = stack[-1]
+            item = next(it, None)
+            if item is None:
+                # This level is exhausted: go back to the parent list
+                stack.pop()
+                continue
+
             raw = item.get("text", "").strip()
             if depth == 0:
                  # Top-level list item
@@ -90,51 +156,65 @@ class BM25Preprocessor:
                 indent = ' ' * (depth * 8)
                 lines.append(f"{indent}* {content}")
 
-            # If this item has a nested sublist, recurse with depth + 1
-            nested = item.get("list", [])
-            nested = item.get("list", [])
+            # If this item has a nested sublist, descend into it with depth + 1
+            nested = item.get("list")
             if nested:
-                self.process_list(nested, depth + 1, lines)
+                stack.append((iter(nested), depth + 1))
 
 
     def normalize(self, text):
 
         text = unicodedata.normalize('NFKC', text)  #1. Unicode normalization
         text = text.lower()  # 2. Lowercase
-        text = re.sub(r"\b(\w+)'s\b", r"\1", text)  # 3. Remove "'s" possessives
-        text = re.sub(r"[^\w\s]", " ", text)  # 4. Remove punctuation (anything that isn’t a word character or whitespace
-        text = re.sub(r"\s+", " ", text).strip()   # 5. Collapse multiple spaces
-        return text
+        text = self._POSSESSIVE.sub(r"\1", text)  # 3. Remove "'s" possessives
+        text = self._PUNCT.sub(" ", text)  # 4. Remove punctuation (anything that isn’t a word character or whitespace
+        return " ".join(text.split())   # 5. Collapse multiple spaces (str.split also strips the ends)
 
 
-    def load_and_prepare(self):
+    def load_and_prepare(self, workers=None):
 
         """
         Load every JSON file in `self.json_dir`, flatten each entry into a text chunk,
         normalize it, and build the BM25 index structures.
+        Args:
+            workers (int | None): Number of worker processes used to read and normalise the files
+                (default: one per CPU core). Use 1 to do everything in the current process.
         """
 
-        # Iterate over all files in the JSON directory in sorted order
-        for file_idx, fname in enumerate(sorted(os.listdir(self.json_dir))):
-            if not fname.lower().endswith('.json'):
-                continue
+        # All JSON files in the directory, in sorted order
+        paths = [os.path.join(self.json_dir, fname)
+                 for fname in sorted(os.listdir(self.json_dir))
+                 if fname.lower().endswith('.json')]
+
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+
+        # Files are independent, so read/flatten/normalise them in parallel;
+        # map() yields results in input order, keeping doc ids deterministic
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                per_file = list(pool.map(_process_file, paths))
+        else:
+            per_file = [_process_file(path) for path in paths]
+
+        for triples in per_file:
+            for chunk, norm_chunk, clean_chunk in triples:
+                # Store the raw text chunk and its display form
+                self.raw_chunks.append(chunk)
+                self.clean_chunks.append(clean_chunk)
+                # Store its normalized form
+                self.normalised_chunks.append(norm_chunk)
 
-            path = os.path.join(self.json_dir, fname)
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)   # data is a list of “entry” dicts
+        self.N = len(self.normalised_chunks)  #Compute total number of chunks N
 
-             # For each entry (chunk) in this JSON file
-            for entry_idx, entry in enumerate(data):
-                chunk = self.flatten_content(entry)
-                if chunk:
-                    # Store the raw text chunk
-                    self.raw_chunks.append(chunk)
-                    # Store its normalized form
-                    self.normalised_chunks.append(self.normalize(chunk))
+        # Fingerprint of the text that retrieval returns, for caches of query results
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in self.clean_chunks:
+            digest.update(chunk.encode("utf-8"))
+            digest.update(b"\x00")
+        self.corpus_digest = digest.hexdigest()
 
-            
-
-        self.N = len(self.normalised_chunks)  #Compute total number of chunks N
+        # Token count per chunk, filled in below
+        self.doc_len = np.zeros(self.N, dtype=np.int32)
 
         # Sum of token counts across all chunks
         total_len = 0
@@ -144,12 +224,10 @@ class BM25Preprocessor:
             tokens = doc.split()
             dl = len(tokens)
             total_len += dl
-            self.doc_len.append(dl)
-            tf_counts = defaultdict(int)
+            self.doc_len[idx] = dl
 
-            # Count term frequencies in this document
-            for tok in tokens:
-                tf_counts[tok] += 1
+            # Count term frequencies in this document (Counter counts in C)
+            tf_counts = Counter(tokens)
 
             # For each unique token in this document, update df and postings
             for tok, freq in tf_counts.items():
@@ -162,9 +240,114 @@ class BM25Preprocessor:
             
             # Compute IDF for each term using BM25’s IDF formula:
             self.idf[tok] = math.log((self.N - df + 0.5) / (df + 0.5) + 1)
+
+            # idf * (k1 + 1) is constant per term, so fold it once instead of per posting
+            self.idf_num[tok] = self.idf[tok] * (self.k1 + 1.0)
+
+        # Store each postings list as two parallel arrays so scoring can be vectorised
+        for tok, plist in self.postings.items():
+            self.p_docs[tok] = np.fromiter(plist.keys(), dtype=np.int32, count=len(plist))
+            self.p_freqs[tok] = np.fromiter(plist.values(), dtype=np.float32, count=len(plist))
+
+        # Precompute the document-length part of the BM25 denominator once
+        if self.avgdl:
+            self.norm_dl = ((1 - self.b) + (self.b / self.avgdl) * self.doc_len).astype(np.float32)
+        else:
+            self.norm_dl = np.ones(self.N, dtype=np.float32)
+
+
+    # Build-time structures that scoring never reads; left out of the disk cache
+    _UNCACHED = ("postings", "normalised_chunks")
+
+    def load_or_prepare(self, cache_path, workers=None):
+
+        """
+        Restore the BM25 index from `cache_path` if it is up to date, otherwise build it
+        with load_and_prepare() and write the cache for the next run.
+        Args:
+            cache_path (str): Pickle file holding the prepared index.
+            workers (int | None): Passed to load_and_prepare when a rebuild is needed.
+        """
+
+        if self.load_cache(cache_path):
+            return
+        self.load_and_prepare(workers=workers)
+        self.save_cache(cache_path)
+
+
+    def save_cache(self, cache_path):
+
+        """Pickle everything score_subset needs (not the build-only postings dicts or normalised text)."""
+
+        state = {k: v for k, v in self.__dict__.items() if k not in self._UNCACHED}
+        state["cache_version"] = BM25_CACHE_VERSION
+        with open(cache_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+    def load_cache(self, cache_path):
+
+        """
+        Load a cache written by save_cache.
+        Args:
+            cache_path (str): Pickle file holding the prepared index.
+        Returns:
+            bool: False (and nothing loaded) if the cache is missing, older than the JSON directory
+                  or any JSON file in it, from another BM25_CACHE_VERSION, or was built with
+                  different json_dir / k1 / b settings.
+        """
+
+        if not os.path.exists(cache_path):
+            return False
+
+        # Adding or removing a file bumps the directory mtime; editing one bumps its own
+        cache_mtime = os.path.getmtime(cache_path)
+        sources = [self.json_dir] + [os.path.join(self.json_dir, fname)
+                                     for fname in os.listdir(self.json_dir)
+                                     if fname.lower().endswith('.json')]
+        if any(os.path.getmtime(src) > cache_mtime for src in sources):
+            return False
+
+        with open(cache_path, 'rb') as f:
+            state = pickle.load(f)
+
+        # Written by different preprocessing code
+        if state.pop("cache_version", None) != BM25_CACHE_VERSION:
+            return False
+
+        if (state.get("json_dir"), state.get("k1"), state.get("b")) != (self.json_dir, self.k1, self.b):
+            return False
+
+        # Written by an older version that lacks some of the current structures
+        if any(k not in state for k in self.__dict__ if k not in self._UNCACHED):
+            return False
+
+        self.__dict__.update(state)
+        return True
         
 
 
+    def candidate_mask(self, candidate_ids):
+
+        """
+        Build the candidate bitmap expected by `score_subset`.
+        Args:
+            candidate_ids (np.ndarray | Iterable[int]): A ready-made bitmap of length N, or document indices.
+        Returns:
+            np.ndarray: np.uint8 array of length N with 1 for every candidate document.
+        """
+
+        # Already a bitmap: use it as-is
+        if (isinstance(candidate_ids, np.ndarray) and candidate_ids.dtype in (np.uint8, np.bool_)
+                and candidate_ids.shape == (self.N,)):
+            return candidate_ids
+
+        cand_mask = np.zeros(self.N, dtype=np.uint8)
+        ids = np.fromiter(candidate_ids, dtype=np.int64)
+        cand_mask[ids] = 1
+        return cand_mask
+
+
     def score_subset(self, query, candidate_ids, top_k = 3):
 
         """
@@ -172,7 +355,9 @@ class BM25Preprocessor:
         compute BM25 scores for each candidate document.
         Args:
             query (str): The user’s raw query string.
-            candidate_ids (Iterable[int]): Document indices to consider.
+            candidate_ids (np.ndarray | Iterable[int]): Preferably a np.uint8 (or bool) bitmap of
+                length N where non-zero entries mark candidate documents; any other iterable of
+                document indices is converted into such a bitmap first.
             top_k (int): Number of top-scoring docs to return.
         Returns:
             List[(doc_id, score)]: Ranked list of (doc_id, BM25_score) tuples.
@@ -181,36 +366,91 @@ class BM25Preprocessor:
         # Normalize the query the same way we normalized documents
         norm_q = self.normalize(query)
         q_tokens = norm_q.split()
-        scores = {}   # Accumulate BM25 scores per doc_id
 
-        # For each token in the query
-        for tok in q_tokens:
-            if tok not in self.postings:
-                continue
-            idf = self.idf.get(tok, 0.0) # IDF for this term
+        # Candidate bitmap: membership of a posting is then a single byte lookup
+        cand_mask = self.candidate_mask(candidate_ids)
+
+        scores = np.zeros(self.N, dtype=np.float32)   # Accumulate BM25 scores per doc_id
+        touched = np.zeros(self.N, dtype=bool)        # Docs that matched at least one query term
+
+        # Only query tokens that actually occur in the corpus contribute
+        q_tokens = [tok for tok in q_tokens if tok in self.p_docs]
+
+        if _bm25_score is not None and q_tokens:
+            # Concatenate the query-term postings so the JIT kernel walks them contiguously
+            lengths = [len(self.p_docs[tok]) for tok in q_tokens]
+            offsets = np.zeros(len(q_tokens) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(lengths)
+            doc_ids_concat = np.concatenate([self.p_docs[tok] for tok in q_tokens])
+            freqs_concat = np.concatenate([self.p_freqs[tok] for tok in q_tokens])
+            idf_num = np.array([self.idf_num.get(tok, 0.0) for tok in q_tokens], dtype=np.float32)
+
+            _bm25_score(doc_ids_concat, freqs_concat, offsets, idf_num, self.norm_dl,
+                        cand_mask, np.float32(self.k1), scores, touched)
 
-            # For every document that contains this term
-            for doc_id, freq in self.postings[tok].items():
-                if doc_id not in candidate_ids:
+        else:
+            # NumPy fallback: score one query term at a time
+            for tok in q_tokens:
+                idf_num = self.idf_num.get(tok, 0.0) # idf * (k1 + 1) for this term
+
+                # Keep only the postings that belong to candidate documents
+                docs = self.p_docs[tok]
+                mask = cand_mask[docs].astype(bool)
+                if not mask.any():
                     continue
-                
-                dl  = self.doc_len[doc_id]  # Document length for this candidate
+                docs = docs[mask]
+                freqs = self.p_freqs[tok][mask]
 
-                # BM25 denominator
-                denom = freq + self.k1 * (1 - self.b + self.b * dl / self.avgdl)
+                # BM25 contribution of this term for every matching candidate at once
+                contrib = freqs / (freqs + self.k1 * self.norm_dl[docs])
+                contrib *= idf_num
 
-                # Accumulate the score
-                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / denom
+                # doc ids are unique within one postings list, so a fancy-indexed add is safe here
+                scores[docs] += contrib
+                touched[docs] = True
 
-        # Sort documents by descending BM25 score
-        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        # Return top_k results
-        return ranked[:top_k]
-                
-    
+        hit_ids = np.flatnonzero(touched)
+        hit_scores = scores[hit_ids]
 
-    
+        # Select the top_k without sorting every hit, then order them by descending score
+        if top_k < len(hit_ids):
+            part = np.argpartition(-hit_scores, top_k)[:top_k]
+            hit_ids, hit_scores = hit_ids[part], hit_scores[part]
+        order = np.argsort(-hit_scores, kind="stable")
 
+        return [(int(hit_ids[i]), float(hit_scores[i])) for i in order]
 
 
-        
+
+def _process_file(path):
+
+    """
+    Read one JSON file and flatten + normalise its entries (module level so worker processes can run it).
+    Args:
+        path (str): Path to a JSON file containing a list of “entry” dicts.
+    Returns:
+        list of (str, str, str): (raw_chunk, normalised_chunk, clean_chunk) for every non-empty entry, in file order.
+    """
+
+    prep = BM25Preprocessor(json_dir=os.path.dirname(path))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)   # data is a list of “entry” dicts
+
+    pairs = []
+    for entry in data:
+        chunk = prep.flatten_content(entry)
+        if chunk:
+            pairs.append((chunk, prep.normalize(chunk), strip_section_lines(chunk)))
+    return pairs
+
+
+def strip_section_lines(chunk):
+
+    """Drop the leading "Section:" heading lines of a flattened chunk (headings still count for BM25 scoring)."""
+
+    lines = chunk.splitlines()
+    start = 0
+    while start < len(lines) and lines[start].startswith("Section:"):
+        start += 1
+    return "\n".join(lines[start:]).strip()
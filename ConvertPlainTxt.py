@@ -4,6 +4,12 @@ import re
 
 class ConvertPlainTxt:
 
+    # Fully-qualified WordprocessingML tag/attribute names, resolved once
+    _PPR = qn("w:pPr")
+    _NUMPR = qn("w:numPr")
+    _ILVL = qn("w:ilvl")
+    _VAL = qn("w:val")
+
     def __init__(self):
 
         # regex pattern to detect top-level section headings
@@ -23,17 +29,19 @@ class ConvertPlainTxt:
         """
 
         p = paragraph._element  # Access the XML element for this paragraph
-        pPr = p.find(qn("w:pPr")) # Look for paragraph properties
+        pPr = p.find(self._PPR) # Look for paragraph properties
         if pPr is None:
             return None
-        numPr = pPr.find(qn("w:numPr")) # Within properties, look for numbering properties
+        numPr = pPr.find(self._NUMPR) # Within properties, look for numbering properties
         if numPr is None:
             return None
 
         # Look for the indentation level element
-        ilvl = numPr.find(qn("w:ilvl"))
-        if ilvl is not None and ilvl.get(qn("w:val")).isdigit():
-            return int(ilvl.get(qn("w:val")))
+        ilvl = numPr.find(self._ILVL)
+        if ilvl is not None:
+            val = ilvl.get(self._VAL)
+            if val is not None and val.isdigit():
+                return int(val)
         return 0  # fallback if <w:ilvl> has no val
 
 
@@ -73,9 +81,20 @@ class ConvertPlainTxt:
             str: The resulting plain text.
         """
         document = Document(docx_path)
-        output = []
+
+        # Lines are streamed straight into the join, so no intermediate line lists are kept
+        full_text = "\n".join(self._iter_lines(document))
+        return full_text
+
+
+    def _iter_lines(self, document):
+        """
+        Yield the output lines of `document` one at a time.
+        The only blank lines emitted are the separators before a section heading, each
+        followed by that heading, so the output never has consecutive blank lines and
+        needs no `collapse_blank_lines` pass.
+        """
         first_section = True   #Flag to detect first section so we don't add a blank line
-        
 
         for para in document.paragraphs:
             # Skip any paragraph explicitly styled as "Heading 1"
@@ -86,38 +105,29 @@ class ConvertPlainTxt:
             if not text:
                 continue
 
+            # Both heading patterns start with a digit, so only run them on lines that do
+            numbered = text[0].isdigit()
+
              # If text matches a top-level section heading 
-            if self.section_heading_pattern.match(text):
+            if numbered and self.section_heading_pattern.match(text):
                 if not first_section:
-                    output.append('')
+                    yield ''
                     
                 first_section = False
-                output.append(text)
+                yield text
                 continue
             
             # If text matches a subsection heading 
-            if self.subsection_heading_pattern.match(text):
-                output.append(text)
+            if numbered and self.subsection_heading_pattern.match(text):
+                yield text
                 continue
 
-            # If the paragraph is a list item
-            if self.is_list_paragraph(para):
-                level = self.get_list_level(para)
+            # If the paragraph is a list item (one XML lookup gives both the answer and the level)
+            level = self.get_list_level(para)
+            if level is not None:
                 
                 # Wrap the list text in an XML-like tag showing its nesting level
-                output.append(f"<ITEM level=\"{level}\">{text}</ITEM>")
+                yield f"<ITEM level=\"{level}\">{text}</ITEM>"
                 continue
 
-            output.append(text)
-      
-        # Collapse any excessive blank lines in the collected output
-        final_output = self.collapse_blank_lines(output)
-        full_text = "\n".join(final_output)
-        return full_text
-
-                
-
-
-
-
-
+            yield text
@@ -1,9 +1,63 @@
+import io
 import re
 import json
 import os
 
+try:
+    import orjson   # Rust serializer, writes UTF-8 bytes directly
+except ImportError:   # orjson is optional: parse_and_save falls back to json.dump
+    orjson = None
+
+# Output keys, shared by every block and group dict
+_TEXT = "text"
+_LIST = "list"
+_SECTION = "Section"
+_SUBSECTION = "Subsection"
+_CONTENT = "Content"
+_TOPIC = "topic"
+
+# Prefix for list item text ("• ")
+_BULLET = "\u2022 "
+
+def _make_group(section, subsection, blocks, topic):
+
+    """
+    Build the output dict for one section / subsection group.
+
+    Args:
+        section (str or None): Section heading text.
+        subsection (str or None): Subsection heading text.
+        blocks (list): The group's content blocks (text and nested lists).
+        topic (str): Topic derived from the source filename.
+    Returns:
+        dict: Section, Subsection, Content, and topic for the group.
+    """
+
+    return {
+        _SECTION: section,
+        _SUBSECTION: subsection,
+        _CONTENT: blocks,
+        _TOPIC: topic,
+    }
+
+
 class ConvertToJson:
 
+    # Regex patterns are compiled once, at class definition, and shared by every instance
+
+    #regex patterns for headings
+    section_pattern = re.compile(r'^(\d+\. )(.+)$')
+    subsection_pattern = re.compile(r'^(\d+(?:\.\d+)+\.?\s)(.+)$')
+
+    # Single line classifier: section heading | subsection heading | list item.
+    # Each alternative is wrapped in a named group so `lastgroup` says which one matched.
+    # Item text is captured already stripped: surrounding whitespace stays outside `txt`.
+    _dispatch = re.compile(
+        r'^(?P<sec>(?P<sec_num>\d+\. )(?P<sec_body>.+))$'
+        r'|^(?P<sub>(?P<sub_num>\d+(?:\.\d+)+\.?\s)(?P<sub_body>.+))$'
+        r'|^(?P<item><ITEM level="(?P<lvl>\d+)">\s*(?P<txt>(?:.*\S)?)\s*</ITEM>)'
+    )
+
     def __init__(self, filepath):
 
         """
@@ -12,10 +66,6 @@ class ConvertToJson:
 
         self.filepath = filepath
 
-        #regex patterns for headings
-        self.section_pattern = re.compile(r'^(\d+\. )(.+)$')           
-        self.subsection_pattern = re.compile(r'^(\d+(?:\.\d+)+\.?\s)(.+)$')
-
 
     def parse_heading_line(self, line, pattern, split=True):
 
@@ -64,7 +114,36 @@ class ConvertToJson:
             list: A list of dicts, each representing a section or subsection group with content.
         """
 
-        lines = text.splitlines()
+        # Iterate the text lazily instead of building a list of every line up front
+        return self.parse_document_stream(io.StringIO(text, newline=None))
+
+
+    def parse_file(self, path):
+
+        """
+        Parse a plain-text file line by line, without reading it into one string first.
+
+        Args:
+            path (str): Path to the UTF-8 plain-text file.
+        Returns:
+            list: A list of dicts, each representing a section or subsection group with content.
+        """
+
+        with open(path, encoding='utf-8') as f:
+            return self.parse_document_stream(f)
+
+
+    def parse_document_stream(self, lines):
+
+        """
+        Parse an iterable of text lines into a JSON-serializable structure.
+
+        Args:
+            lines (iterable of str): The document's lines, with or without trailing newlines.
+        Returns:
+            list: A list of dicts, each representing a section or subsection group with content.
+        """
+
         data = []
 
         #Derive a "topic" from the filename: take basename, remove extension, split on "-",
@@ -74,124 +153,118 @@ class ConvertToJson:
         current_section = None
         current_subsection = None
         current_blocks = []
-        list_stack = None
-
-        def flush_group():
-            """
-            When we hit a new section or subsection, finalize the previous group (if any):
-            - Combine all text and nested lists into a single "Content" list.
-            - Append a dict with Section, Subsection, Content, and topic to `data`.
-            """
-            nonlocal current_section, current_subsection, current_blocks
-            
-            if not current_blocks:
-                return
-
-            # Helper to combine nested blocks into a single string
-            def collect_content(blocks):
-                texts = []
-                for blk in blocks:
-                    texts.append(blk.get('text', ''))
-                    def dfs(items):
-                        for itm in items:
-                            texts.append(itm.get('text', ''))
-                            if itm.get('list'):
-                                dfs(itm['list'])
-                    dfs(blk.get('list', []))
-                    
-                return " ".join(texts)
-            
-            # Build the group dict
-            group = {
-                "Section": current_section,
-                "Subsection": current_subsection,
-                "Content": current_blocks,
-                "topic": topic,
-                    }
-            data.append(group)
-
-            # Reset blocks and list_stack for the next group
-            current_blocks = []
-            list_stack = None
-
-        item_re = re.compile(r'<ITEM level="(?P<lvl>\d+)">(?P<txt>.*)</ITEM>')  # Regex to detect list items
+
+        # Open nested lists: list_stack[:depth] holds the item list at each level (depth 0 = no open list).
+        # The buffer is reused across lists and only grows past 16 levels for unusually deep nesting.
+        list_stack = [None] * 16
+        depth = 0
+
+        # Bound methods hoisted out of the loop (blocks_append is rebound whenever current_blocks is replaced)
+        _match = self._dispatch.match
+        blocks_append = current_blocks.append
 
         for idx, raw in enumerate(lines, start=1):
             line = raw.strip()
             if not line:
                 continue
 
-            # Check for a top-level section heading
-            sec_m = self.section_pattern.match(line)
-            if sec_m:
-                flush_group()
+            # Classify the line with one regex call. Headings start with a digit and items
+            # with "<ITEM", so plain prose skips the regex entirely.
+            c0 = line[0]
+            if c0.isdigit() or (c0 == "<" and line.startswith("<ITEM")):
+                m = _match(line)
+                kind = m.lastgroup if m else None
+            else:
+                kind = None
+
+            # Plain text (the common case, so it is tested first): it also ends any open list
+            if kind is None:
+                depth = 0
+                blocks_append({_TEXT: line})
+                continue
 
-                # Extract the section heading text (drop the numbering)
-                current_section, extra = self.parse_heading_line(line, self.section_pattern, split=False)
-                match = re.match(r'^(\d+\. )(.+)$', current_section)
-                if match:
-                    current_section = match.group(2)  # e.g. from "1. Introduction" take "Introduction"
+            # Top-level section heading
+            if kind == "sec":
+                # Finalize the previous group (if it has content) before starting a new one
+                if current_blocks:
+                    data.append(_make_group(current_section, current_subsection, current_blocks, topic))
+                    current_blocks = []
+                    blocks_append = current_blocks.append
+                depth = 0
+
+                # Keep the section heading text (drop the numbering), e.g. "1. Introduction" -> "Introduction"
+                current_section = m.group('sec_body')
                 current_subsection = None
                 continue
 
-            # Check for a subsection heading
-            sub_m = self.subsection_pattern.match(line)
-            if sub_m:
-                flush_group()
-                
-                current_subsection, extra = self.parse_heading_line(line, self.subsection_pattern, split=True)
-                match = re.match(r'^(\d+(?:\.\d+)+\.?\s)(.+)$', current_subsection)
-                if match:
-                    current_subsection = match.group(2)
+            # Subsection heading
+            if kind == "sub":
+                if current_blocks:
+                    data.append(_make_group(current_section, current_subsection, current_blocks, topic))
+                    current_blocks = []
+                    blocks_append = current_blocks.append
+                depth = 0
+
+                # Reuse the classifier's captures: heading text after the numbering, split at a colon
+                rest = m.group('sub_body')
+                colon_index = rest.find(":")
+                if colon_index != -1:
+                    # An empty heading before the colon leaves just the numbering, e.g. "1.1 "
+                    current_subsection = rest[:colon_index].strip() or m.group('sub_num')
+                    extra = rest[colon_index+1:].strip()
+                else:
+                    current_subsection = rest
+                    extra = ""
 
                 # If there was extra text after a colon, treat it as an initial content block
                 if extra:
-                    current_blocks.append({"text": extra})
+                    blocks_append({_TEXT: extra})
                 continue
 
-            # Check if the line is a list item
-            m = item_re.match(line)
-            if m:
+            # List item
+            if kind == "item":
                 try: 
                     lvl = int(m.group('lvl'))  # indentation level
-                    txt = m.group('txt').strip()
-                    bullet_txt = f"• {txt}"   # prepend a bullet character for readability
+                    txt = m.group('txt')
+                    bullet_txt = _BULLET + txt   # prepend a bullet character for readability
 
-                    if list_stack is None:
+                    if depth == 0:
                         # First time encountering a list item in the current block:
                         if not current_blocks:
-                            current_blocks.append({"text":""})
+                            blocks_append({_TEXT: ""})
 
                         # Initialize the first level of list nesting
-                        current_blocks[-1].setdefault("list", [])
-                        list_stack = [current_blocks[-1]["list"] ]
+                        last = current_blocks[-1]
+                        if _LIST not in last:
+                            last[_LIST] = []
+                        list_stack[0] = last[_LIST]
+                        depth = 1
 
                     # If current stack depth is deeper than this level, pop up
-                    while len(list_stack) - 1 > lvl:
-                        list_stack.pop()
+                    if depth > lvl + 1:
+                        depth = lvl + 1
 
                     # If lvl deeper than current stack depth: create a new nested list level
-                    if lvl > len(list_stack) - 1:
-                        parent = list_stack[-1][-1]
-                        parent.setdefault("list", [])
-                        list_stack.append(parent["list"])
+                    if lvl >= depth:
+                        parent = list_stack[depth - 1][-1]
+                        if _LIST not in parent:
+                            parent[_LIST] = []
+                        if depth == len(list_stack):
+                            list_stack.append(None)
+                        list_stack[depth] = parent[_LIST]
+                        depth += 1
 
-                    list_stack[-1].append({"text": bullet_txt})
+                    list_stack[depth - 1].append({_TEXT: bullet_txt})
 
                 except IndexError:
                     print(f"\nIndexError on line {idx!r}: {raw!r}")
-                    print(f"  Current list_stack: {list_stack}")
+                    print(f"  Current list_stack: {list_stack[:depth]}")
                     print(f"  Parsed lvl={lvl}, txt={txt!r}")
                     raise
                 continue
 
-            # If we reach here, it's not a list item: reset list_stack context
-            if list_stack is not None:
-                list_stack = None
-
-            current_blocks.append({"text": line})
-
-        flush_group()
+        if current_blocks:
+            data.append(_make_group(current_section, current_subsection, current_blocks, topic))
         return data
 
 
@@ -206,7 +279,11 @@ class ConvertToJson:
 
         data = self.parse_document(text)
 
+        if orjson is not None:
+            # Serialize in one native call and write the bytes in a single write
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return
+
         with open(output_file, "w", encoding ='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
-
-                 
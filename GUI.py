@@ -1,30 +1,47 @@
 import sys
 import os
 import webbrowser
-import pandas as pd
 from types import SimpleNamespace
-from num2words import num2words
+from functools import lru_cache
 
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QTableWidgetItem, QStackedWidget,
+    QApplication, QMainWindow, QWidget, QStackedWidget,
     QPushButton, QLineEdit, QLabel, QInputDialog, QMessageBox, QToolButton,
-    QHBoxLayout, QVBoxLayout, QTextEdit, QComboBox, QTableWidget, QSizePolicy,
-    QGroupBox, QSplitter, QGraphicsOpacityEffect
+    QHBoxLayout, QVBoxLayout, QTextEdit, QComboBox, QTableView, QSizePolicy,
+    QGroupBox, QSplitter, QGraphicsOpacityEffect, QHeaderView
 )
-from PySide6.QtCore import Qt, QSize, QTimer, QPropertyAnimation
-from PySide6.QtGui import QAction, QMovie, QIcon
+from PySide6.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QVariantAnimation
+from PySide6.QtGui import QAction, QMovie, QIcon, QTextCursor, QFontMetrics
 
-import matplotlib
-matplotlib.use('Qt5Agg')  # ensure Qt5Agg backend
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+# matplotlib, pandas, pytrends, trendspy and the agents (FAISS, embeddings, LLM) are imported
+# where they are first used, so the window can paint before those modules load
+from GenerateWorker import GenerateWorker
+from PandasModel import PandasModel
+from RetrievalWorker import RetrievalWorker
 
-from pytrends.request import TrendReq
-from trendspy import Trends
 
-from AgentPipeline import RetrievalAgent, ContentAgent
-from GenerateWorker import GenerateWorker
-from TrendsWorker import TrendsWorker
+# Line drawn between the blocks of consecutive queries in the extraction panel
+EXTRACTION_SEPARATOR = "\n" + "-" * 100 + "\n\n"
+
+# Bound on each results view: Qt drops the oldest lines past MAX_RESULT_LINES
+MAX_RESULT_LINES = 500
+
+
+@lru_cache(maxsize=128)
+def _subsec_word(n):
+
+    """
+    Spell out a subsection count in English words, e.g. 3 -> "three".
+
+    Args:
+        n (int): The number of subsections.
+    Returns:
+        str: The cardinal number as words.
+    """
+
+    # Imported on first use: num2words loads its locale data at import time
+    from num2words import num2words
+    return num2words(n, to='cardinal', lang='en')
 
 
 class SystemGUI(QMainWindow):
@@ -36,6 +53,9 @@ class SystemGUI(QMainWindow):
       - Google Trends functionality via pytrends
     """
 
+    # Pages of the right-hand panel stack (the trends page is added on first use)
+    WELCOME_PAGE, EXTRACT_PAGE, GENERATE_PAGE, TRENDS_PAGE = range(4)
+
     def __init__(self):
 
         """
@@ -45,19 +65,24 @@ class SystemGUI(QMainWindow):
 
         super().__init__()
 
-        self.retrieval_agent = RetrievalAgent() # Instantiate the retrieval agent
-        self.retrieval_agent.init() # Load any required indexes/models
-        
-        self.content_agent = ContentAgent()  # Instantiate the content agent 
+        # The agents load their indexes and models on first use (see load_agents)
+        self.retrieval_agent = None
+        self.content_agent = None
+        self.agents_pending = False   # True while a deferred load_agents call is scheduled
 
-        self.pytrends = TrendReq()   #Set up pytrends objects for fetching Google Trends data
+        # Recent queries -> retrieved chunks; retrieval depends only on the query and the static index
+        self._retrieve_cached = lru_cache(maxsize=64)(lambda q: tuple(self.retrieval_agent.retrieve(q)))
 
-        # Trends is used to fetch related queries ('top' and 'rising')
-        self.trends = Trends()
+        # pytrends / trendspy clients are created on the first comparison (see load_trend_clients)
+        self.pytrends = None
+        self.trends_factory = None
+        self.trends_worker = None   # reused for every comparison (see compare_trends)
         
         self.current_query = ""
         self.chunks = []
-        self.last_block_pos = 0
+        self.confirmed_keys = set()   # (query, chunk hash) pairs already passed to retrieval_agent.confirm
+        self.last_block_mark = None   # cursor kept at the start of the last extraction block
+        self.generation_mark = None   # cursor kept at the start of the generation in progress
         self.waiting_for_retry = False
         self.mode = ""
 
@@ -69,21 +94,14 @@ class SystemGUI(QMainWindow):
         self.setWindowTitle("System GUI")
         self.resize(700, 600)
 
-        #buffers for toggling
-        self.extraction_display = ""
-        self.generation_display = ""
-
         # Central widget and layout
         central = QWidget(self)
         main_layout = QHBoxLayout(central)
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(0)
-        main_layout.addWidget(left_panel, 1)
-        main_layout.addWidget(right_panel, 4)
 
         # Left panel: 40% width, colored background
         left_panel = QWidget(central)
-        left_panel.setStyleSheet("background-color: #d7c9b6;")  # AliceBlue
         left_layout = QVBoxLayout(left_panel)
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.setSpacing(20)
@@ -111,13 +129,12 @@ class SystemGUI(QMainWindow):
 
         # Right panel: 60% width, white background
         right_panel = QWidget(central)
-        right_panel.setStyleSheet("background-color: white;")
         right_layout = QVBoxLayout(right_panel)
         right_layout.setContentsMargins(10, 10, 10, 10)
         right_layout.setSpacing(10)
 
         # Create a container widget on the right panel to hold the welcome text and instructions
-        self.front_container = QWidget(right_panel)
+        self.front_container = QWidget()
         fc_layout = QVBoxLayout(self.front_container)
         fc_layout.setContentsMargins(0,0,0,0)
         fc_layout.setSpacing(10)
@@ -149,8 +166,11 @@ class SystemGUI(QMainWindow):
             </ul>
         </div>
         """
-        # Create another QLabel that will render the HTML instructions
-        self.instruction_label = QLabel(html_instructions)
+        # Create another QLabel that will render the HTML instructions. The format is declared
+        # up front, so the label parses the HTML once into its cached document without sniffing it first
+        self.instruction_label = QLabel()
+        self.instruction_label.setTextFormat(Qt.RichText)
+        self.instruction_label.setText(html_instructions)
         self.instruction_label.setAlignment(Qt.AlignCenter)
         self.instruction_label.setWordWrap(True)
 
@@ -162,20 +182,20 @@ class SystemGUI(QMainWindow):
         self.instruction_label.hide()
         fc_layout.addWidget(self.instruction_label)
 
-        right_layout.addWidget(self.front_container, alignment=Qt.AlignVCenter)
-        
-        # Text area for results (initially hidden)
-        self.results_text = QTextEdit()
-        self.results_text.setReadOnly(True)
-        self.results_text.setStyleSheet(
-            "border: 1px solid gray;"
-            "border-radius: 3px;"
-        )
-        self.results_text.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.results_text.hide()
-        right_layout.addWidget(self.results_text, stretch=1)
+        # Each panel is one page of a stacked widget, so switching panels is a single setCurrentIndex
+        # call instead of hiding and showing every widget of the other panels
+        self.panels = QStackedWidget()
+        self.panels.addWidget(self.front_container)
+
+        # Extract page: its own results area, the confirmation prompt and the query input
+        extract_page = QWidget()
+        extract_page_layout = QVBoxLayout(extract_page)
+        extract_page_layout.setContentsMargins(0, 0, 0, 0)
+        extract_page_layout.setSpacing(10)
+
+        self.extract_text = self.make_results_view()
+        extract_page_layout.addWidget(self.extract_text, stretch=1)
 
-        # Create a horizontal layout to hold the status text and loading spinner
         status_layout = QHBoxLayout()
         
         # QLabel to display the loading spinner animation
@@ -192,7 +212,6 @@ class SystemGUI(QMainWindow):
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.spinner_label)
         status_layout.addStretch()
-        right_layout.addLayout(status_layout)
         
         # Confirmation prompt
         self.confirm_widget = QWidget()
@@ -206,7 +225,7 @@ class SystemGUI(QMainWindow):
         confirm_layout.addWidget(self.yes_button)
         confirm_layout.addWidget(self.no_button)
         self.confirm_widget.hide()
-        right_layout.addWidget(self.confirm_widget)
+        extract_page_layout.addWidget(self.confirm_widget)
         
         extract_layout = QHBoxLayout()
         self.query_input = QLineEdit()
@@ -216,14 +235,22 @@ class SystemGUI(QMainWindow):
             "border: 1px solid gray;"
             "border-radius: 3px;"
         )
-        self.query_input.hide()
 
         self.clear_btn = QPushButton("Clear")
-        self.clear_btn.hide()
 
         extract_layout.addWidget(self.query_input)
         extract_layout.addWidget(self.clear_btn)
-        right_layout.addLayout(extract_layout)      
+        extract_page_layout.addLayout(extract_layout)
+        self.panels.addWidget(extract_page)
+
+        # Generate page: its own results area and the generation inputs
+        generate_page = QWidget()
+        generate_page_layout = QVBoxLayout(generate_page)
+        generate_page_layout.setContentsMargins(0, 0, 0, 0)
+        generate_page_layout.setSpacing(10)
+
+        self.generate_text = self.make_results_view()
+        generate_page_layout.addWidget(self.generate_text, stretch=1)
 
         self.mode_combo = QComboBox()
         self.mode_combo.addItems(["Write Intro", "Full Article", "Write Pre-Law statement"])
@@ -233,8 +260,7 @@ class SystemGUI(QMainWindow):
             "color: gray;"
         )
         self.mode_combo.currentTextChanged.connect(self.on_mode_change)
-        self.mode_combo.hide()
-        right_layout.addWidget(self.mode_combo)
+        generate_page_layout.addWidget(self.mode_combo)
 
         self.topic_input = QLineEdit()
         self.topic_input.setPlaceholderText("Article Topic")
@@ -243,8 +269,7 @@ class SystemGUI(QMainWindow):
             "border: 1px solid gray;"
             "border-radius: 3px;"
         )
-        self.topic_input.hide()
-        right_layout.addWidget(self.topic_input)
+        generate_page_layout.addWidget(self.topic_input)
 
         self.subsec_input = QLineEdit()
         self.subsec_input.setPlaceholderText("Max Number of Subsections")
@@ -253,15 +278,22 @@ class SystemGUI(QMainWindow):
             "border: 1px solid gray;"
             "border-radius: 3px;"
         )
-        self.subsec_input.hide()
-        right_layout.addWidget(self.subsec_input)
+        self.subsec_input.hide()   # only shown for "Full Article"
+        generate_page_layout.addWidget(self.subsec_input)
+        self.panels.addWidget(generate_page)
 
-        self.stack = QStackedWidget()
-        right_layout.addWidget(self.stack, stretch=1)
-        
-        self.stack.addWidget(self.build_trends_page())
-        self.stack.hide()
-      
+        # The trends page (and matplotlib) is built the first time the Trends panel is opened
+        right_layout.addWidget(self.panels, stretch=1)
+
+        # The status row sits under every panel, so trends fetching shows the spinner too
+        right_layout.addLayout(status_layout)
+
+        # Panel stylesheets are applied once both panels are fully populated, so each child is polished
+        # a single time instead of once per stylesheet change
+        left_panel.setStyleSheet("background-color: #d7c9b6;")  # AliceBlue
+        right_panel.setStyleSheet("background-color: white;")
+
+        # Both panels are added to the main layout exactly once, after they are built
         main_layout.addWidget(left_panel, 1)
         main_layout.addWidget(right_panel, 4)
         
@@ -284,35 +316,21 @@ class SystemGUI(QMainWindow):
 
         self.welcome_text = "Welcome to your Legal Content Generator!"
         self.welcome_label.setText("")
-        self.welcome_idx = 0
-        self.welcome_label.show()
         
         self.instruction_label.hide()
         self.instr_opacity.setOpacity(0.0)
-        
-        self.topic_input.hide()
-        self.subsec_input.hide()
-        self.confirm_widget.hide()
-        self.mode_combo.hide()       
-        self.clear_btn.hide()
-        self.results_text.hide()
-        self.query_input.hide()
-        self.stack.hide()
-
-        self.welcome_timer = QTimer(self)
-        self.welcome_timer.timeout.connect(self.update_welcome_txt)
-        self.welcome_timer.start(100)
-
-    def update_welcome_txt(self):
-
-        if self.welcome_idx < len(self.welcome_text):
-            current_txt = self.welcome_label.text()
-            next_char = self.welcome_text[self.welcome_idx]
-            self.welcome_label.setText(current_txt + next_char)
-            self.welcome_idx += 1
-        else:
-            self.welcome_timer.stop()
-            self.fade_in_instruction()
+
+        self.panels.setCurrentIndex(self.WELCOME_PAGE)
+
+        # Typewriter effect: one animation drives the number of visible characters (100 ms per character)
+        # on Qt's shared animation timer; the label is only updated when that number changes
+        self.welcome_anim = QVariantAnimation(self)
+        self.welcome_anim.setStartValue(0)
+        self.welcome_anim.setEndValue(len(self.welcome_text))
+        self.welcome_anim.setDuration(100 * len(self.welcome_text))
+        self.welcome_anim.valueChanged.connect(lambda n: self.welcome_label.setText(self.welcome_text[:n]))
+        self.welcome_anim.finished.connect(self.fade_in_instruction)
+        self.welcome_anim.start()
 
     def fade_in_instruction(self):
         self.instruction_label.show()
@@ -358,6 +376,12 @@ class SystemGUI(QMainWindow):
 
 
     def build_trends_page(self):
+
+        import matplotlib
+        matplotlib.use('Qt5Agg')  # ensure Qt5Agg backend
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
         page = QWidget()
         layout = QVBoxLayout(page)
         layout.setContentsMargins(12, 12, 12, 12)
@@ -388,13 +412,15 @@ class SystemGUI(QMainWindow):
 
         self.figure = Figure()
         self.canvas = FigureCanvas(self.figure)
+        self.figure.set_size_inches(6, 4)
+        self.ax = self.figure.add_subplot(111)   # one Axes, cleared and reused for every comparison
         chart_box = QGroupBox("Trend Over Time")
         cbl = QVBoxLayout(chart_box)
         cbl.setContentsMargins(4,4,4,4)
         cbl.addWidget(self.canvas)
         splitter.addWidget(chart_box)
 
-        self.related_table = QTableWidget()
+        self.related_table = QTableView()   # filled through a PandasModel (see show_related_queries)
         self.related_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         table_box = QGroupBox("Related Queries")
         tbl = QVBoxLayout(table_box)
@@ -402,6 +428,7 @@ class SystemGUI(QMainWindow):
         self.related_table.setAlternatingRowColors(True)
         self.related_table.verticalHeader().setVisible(False)
         self.related_table.horizontalHeader().setStretchLastSection(True)
+        self.related_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)   # sized in show_related_queries
         tbl.addWidget(self.related_table)
         splitter.addWidget(table_box)
 
@@ -428,76 +455,113 @@ class SystemGUI(QMainWindow):
         self.status_label.setText(text)
         self.status_label.show()
         self.spinner_label.show()
-        self.spinner_movie.start()
-        QApplication.processEvents()
+        self.spinner_movie.start()   # painted on the next event-loop turn; the long work runs in workers
 
     def stop_spinner(self):
         self.spinner_movie.stop()
         self.spinner_label.hide()
         self.status_label.hide()
-        QApplication.processEvents()
+
+    def make_results_view(self):
+
+        """Create a read-only text area for one panel's results."""
+
+        view = QTextEdit()
+        view.setReadOnly(True)
+        view.setUndoRedoEnabled(False)   # text is only edited programmatically; keep no undo history
+        view.document().setMaximumBlockCount(MAX_RESULT_LINES)   # bound memory and layout cost
+        view.setStyleSheet(
+            "border: 1px solid gray;"
+            "border-radius: 3px;"
+        )
+        view.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        return view
 
     def show_trends_panel(self):
-        self.front_container.hide()
-        self.instr_opacity.setOpacity(0.0)
-        
-        self.topic_input.hide()
-        self.subsec_input.hide()
-        self.confirm_widget.hide()
-        self.mode_combo.hide()       
-        self.clear_btn.hide()
-        self.results_text.hide()
-        self.query_input.hide()
+        if self.panels.count() == self.TRENDS_PAGE:
+            self.panels.addWidget(self.build_trends_page())
 
-        self.stack.show()
-        self.stack.setCurrentIndex(0)
+        self.panels.setCurrentIndex(self.TRENDS_PAGE)
         
     def show_query_panel(self):
         """Reveal the query input and results list for legal info extraction."""
 
-        self.front_container.hide()
-        self.instr_opacity.setOpacity(0.0)
-        self.stack.hide()
+        # The extract page keeps its own document, so nothing needs re-rendering here
+        self.panels.setCurrentIndex(self.EXTRACT_PAGE)
+        self.query_input.setFocus()
+        self.schedule_agent_loading()
 
-        self.topic_input.hide()
-        self.subsec_input.hide()
-        self.confirm_widget.hide()
-        self.mode_combo.hide()
+    def show_generate_panel(self):
+        
+        self.panels.setCurrentIndex(self.GENERATE_PAGE)
+        self.topic_input.setFocus()
+        self.schedule_agent_loading()
 
-        self.results_text.show()
-        self.results_text.setPlainText(self.extraction_display)
 
-        self.clear_btn.show()
-        self.query_input.show()
+    def schedule_agent_loading(self):
 
-        self.query_input.setFocus()
+        """
+        Load the agents just after the current panel has painted, showing the spinner meanwhile.
+        """
 
-    def show_generate_panel(self):
-        
-        self.front_container.hide()
-        self.instr_opacity.setOpacity(0.0)
-        self.stack.hide()
+        if self.retrieval_agent is not None or self.agents_pending:
+            return
 
-        self.query_input.hide()
-        self.clear_btn.hide()
-        self.confirm_widget.hide()
+        self.agents_pending = True
+        self.start_spinner("Loading knowledge base...")
 
-        self.results_text.show()
-        self.results_text.setPlainText(self.generation_display)
+        # A zero-delay timer fires once the event loop has processed the pending paint events
+        QTimer.singleShot(0, self.load_agents)
+
+
+    def load_agents(self):
+
+        """
+        Import and initialise the retrieval and content agents if that has not happened yet.
+        Safe to call more than once; later calls return immediately.
+        """
+
+        if self.retrieval_agent is None:
+            from AgentPipeline import RetrievalAgent, ContentAgent
+
+            retrieval_agent = RetrievalAgent() # Instantiate the retrieval agent
+            retrieval_agent.init() # Load any required indexes/models
+
+            # Instantiate the content agent; it reuses the retriever's embedding model for its response cache
+            self.content_agent = ContentAgent(embedder=retrieval_agent.retriever.sb)
+            self.retrieval_agent = retrieval_agent
+
+        if self.agents_pending:
+            self.agents_pending = False
+            self.stop_spinner()
+
+
+    def load_trend_clients(self):
+
+        """Create the pytrends / trendspy clients on the first comparison."""
+
+        if self.pytrends is None:
+            from pytrends.request import TrendReq
+            from trendspy import Trends
+
+            self.pytrends = TrendReq()   #Set up pytrends objects for fetching Google Trends data
+
+            # Trends clients fetch related queries ('top' and 'rising'); the worker builds one per fetch thread
+            self.trends_factory = Trends
 
-        self.topic_input.show()
-        self.topic_input.setFocus()
-    
-        self.mode_combo.show()
-        
 
     def clear_results(self):
 
-        self.extraction_display = ""
-        self.generation_display = ""
-        self.retrieval_agent.confirmed_results.clear()
+        self.last_block_mark = None
+        self.confirmed_keys.clear()
+        if self.retrieval_agent is not None:
+            self.retrieval_agent.confirmed_results.clear()
+        self._retrieve_cached.cache_clear()
 
-        self.results_text.clear()
+        self.extract_text.clear()
+        self.confirm_widget.hide()
+        if self.generation_mark is None:   # leave a generation that is still streaming alone
+            self.generate_text.clear()
         
 
     def on_mode_change(self, mode):
@@ -518,64 +582,89 @@ class SystemGUI(QMainWindow):
 
         self.start_spinner("Fetching Google Trends data...")
 
-        self.worker = TrendsWorker(kws, self.pytrends, self.trends)
-        self.worker.finished.connect(self.trends_done)
-        self.worker.error.connect(self.trends_error)
-    
-        self.worker.start()
-         b  
+        from TrendsWorker import TrendsWorker   # pulls in pandas
+        self.load_trend_clients()
+
+        worker = self.trends_worker
+        if worker is not None and worker.isRunning():
+            # Cancel the comparison still in progress; it stops at its next pause without emitting
+            worker.requestInterruption()
+            worker.wait(100)
+            if worker.isRunning():
+                # Still inside an HTTP request: the window (its parent) keeps it alive until it returns
+                worker = None
+
+        if worker is None:
+            worker = TrendsWorker(kws, self.pytrends, self.trends_factory, parent=self)
+            worker.finished.connect(self.trends_done)
+            worker.error.connect(self.trends_error)
+            self.trends_worker = worker
+        else:
+            # Restart the finished thread with the new keywords instead of creating another one
+            worker.keywords = kws
+
+        worker.start()
 
     def trends_done(self, top10, allq):
 
         self.stop_spinner()
 
-        self.figure.set_size_inches(6, 4)  
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
+        # Clear the persistent Axes rather than rebuilding the figure's Axes, axis and spine objects
+        ax = self.ax
+        ax.clear()
         top10.plot(kind="bar", ax=ax)
         
         self.style_trends_plot(ax)
 
-        self.canvas.draw()
+        self.canvas.draw_idle()   # let Qt coalesce the repaint with the next event-loop turn
         self.canvas.show()
 
-        tbl = self.related_table
-        tbl.show()
-
         if allq.empty:
+            import pandas as pd   # already loaded by the trends worker
             display_df = pd.DataFrame({"Notice": ["No related queries available."]})
         else:
             # drop any "value" columns
             cols = [c for c in allq.columns if "value" not in c]
             display_df = allq[cols]
 
-        tbl.clear()
-        tbl.setRowCount(len(display_df))
-        tbl.setColumnCount(len(display_df.columns))
-        tbl.setHorizontalHeaderLabels(display_df.columns.tolist())
+        self.show_related_queries(display_df)
 
-        for i, row in display_df.iterrows():
-            for j, col in enumerate(display_df.columns):
-                tbl.setItem(i, j, QTableWidgetItem(str(row[col])))
 
-        tbl.resizeColumnsToContents()
-        
-        
+    def show_related_queries(self, df):
+
+        """
+        Display a DataFrame in the related-queries table.
+
+        Args:
+            df (pandas.DataFrame): The rows to show; the view reads the cells it draws from the model.
+        """
+
+        tbl = self.related_table
+        old = tbl.model()
+        tbl.setModel(PandasModel(df, tbl))
+        if old is not None:
+            old.deleteLater()   # the previous comparison's model is no longer referenced
+
+        # Size columns from the header and the first rows only; resizeColumnsToContents would
+        # measure every cell of every column through the model
+        header = tbl.horizontalHeader()
+        fm = QFontMetrics(tbl.font())
+        sample = df.head(20).to_numpy(dtype=object)
+        for j, col in enumerate(df.columns):
+            width = max([fm.horizontalAdvance(str(col))] + [fm.horizontalAdvance(str(v)) for v in sample[:, j]])
+            header.resizeSection(j, width + 24)   # room for cell padding and the sort indicator
+
+        tbl.show()
+
 
     def trends_error(self, msg):
         self.stop_spinner()
 
-        self.canvas.draw()
+        self.canvas.draw_idle()
         self.canvas.show()
 
-        tbl = self.related_table
-        tbl.show()
-        tbl.clear()
-        tbl.setRowCount(1)
-        tbl.setColumnCount(1)
-        tbl.setHorizontalHeaderLabels(["Related Queries"])
-        tbl.setItem(0,0, QTableWidgetItem("Could not fetch related queries."))
-        tbl.resizeColumnsToContents()
+        import pandas as pd   # already loaded by the trends worker
+        self.show_related_queries(pd.DataFrame({"Related Queries": ["Could not fetch related queries."]}))
         
         QMessageBox.critical(self, "Error fetching trends", msg)
 
@@ -587,40 +676,107 @@ class SystemGUI(QMainWindow):
             return
 
         self.current_query = query
+        self.load_agents()   # no-op unless the query arrived before the deferred load ran
 
-        self.chunks = self.retrieval_agent.retrieve(query)
-        self.current_chunk_idx = 0
+        self.start_spinner("Extracting legal information...")
+        self.query_input.setEnabled(False)
+
+        # Embedding + search run in a worker thread so the window stays responsive.
+        # Whitespace-normalised key, so re-typing the same query skips embedding + search
+        self.retrieve_worker = RetrievalWorker(self._retrieve_cached, " ".join(query.split()))
+        self.retrieve_worker.finished.connect(self.query_done)
+        self.retrieve_worker.error.connect(self.query_error)
+        self.retrieve_worker.start()
 
-        full=self.extraction_display
+
+    def query_done(self, chunks):
+        """Display the first retrieved chunk for the current query."""
+
+        self.stop_spinner()
+        self.query_input.setEnabled(True)
+
+        query = self.current_query
+        self.chunks = chunks
+        self.current_chunk_idx = 0
 
         raw  = self.chunks[self.current_chunk_idx]
         body = raw.split("\n", 1)[1].strip() if "\n" in raw else raw
+        block=f"Query: {query}\n\nExtracted Legal Info:\n{body}"
 
         if self.waiting_for_retry:
-            prefix=full[:self.last_block_pos]
-            sep = "\n" + "-"*100 + "\n\n" if self.last_block_pos > 0 else ""
-            block=f"{sep}Query: {self.query_input.text().strip()}\n\nExtracted Legal Info:\n{body}"
-            
-            self.extraction_display = prefix + block
-
+            # Replace the block of the query that ran out of results
+            self.replace_extraction_block(block)
             self.waiting_for_retry = False
 
         else:
-            self.last_block_pos=len(full)
-            sep = "\n" + "-"*100 + "\n\n" if len(full) > 0 else ""
-            block=f"{sep}Query: {query}\n\nExtracted Legal Info:\n{body}"
-            self.extraction_display += block
+            self.append_extraction_block(block)
 
-        self.results_text.setPlainText(self.extraction_display)
-        self.last_block_pos = len(self.extraction_display) - len(block)
         self.confirm_widget.show()
 
+
+    def end_cursor(self, view):
+
+        """Return a text cursor at the end of a results view's document."""
+
+        cursor = QTextCursor(view.document())
+        cursor.movePosition(QTextCursor.End)
+        return cursor
+
+
+    def make_mark(self, cursor):
+
+        """
+        Return a cursor that remembers where a block of text starts. A cursor is kept rather than
+        an integer position, because Qt shifts it when old lines are dropped from the top.
+        """
+
+        mark = QTextCursor(cursor)
+        mark.setKeepPositionOnInsert(True)   # stay in front of the block text inserted here
+        return mark
+
+
+    def append_extraction_block(self, block):
+
+        """Add a new extraction block, inserting only its text at the end of the document."""
+
+        cursor = self.end_cursor(self.extract_text)
+        if self.last_block_mark is not None:
+            cursor.insertText(EXTRACTION_SEPARATOR)
+        self.last_block_mark = self.make_mark(cursor)
+        cursor.insertText(block)
+
+
+    def replace_extraction_block(self, block):
+
+        """Replace the last extraction block, rewriting only the document text after its start."""
+
+        if self.last_block_mark is None:
+            self.append_extraction_block(block)
+            return
+
+        cursor = self.end_cursor(self.extract_text)
+        cursor.setPosition(self.last_block_mark.position(), QTextCursor.KeepAnchor)
+        cursor.insertText(block)   # replaces the selected old block (and any note after it)
+
+
+    def query_error(self, msg):
+
+        self.stop_spinner()
+        self.query_input.setEnabled(True)
+        self.query_input.setFocus()
+
+        QMessageBox.critical(self, "Error extracting legal information", msg)
+
     
     def confirm_yes(self):
         
         approved_chunk = self.chunks[self.current_chunk_idx]
 
-        self.retrieval_agent.confirm(self.current_query, approved_chunk)
+        # Confirm each (query, chunk) pair once, so a repeated Yes does not store a duplicate snippet
+        key = (self.current_query, hash(approved_chunk))
+        if key not in self.confirmed_keys:
+            self.confirmed_keys.add(key)
+            self.retrieval_agent.confirm(self.current_query, approved_chunk)
         
         self.confirm_widget.hide()
         self.query_input.clear()
@@ -634,29 +790,15 @@ class SystemGUI(QMainWindow):
             raw  = self.chunks[self.current_chunk_idx]
             body = raw.split("\n", 1)[1].strip() if "\n" in raw else raw
             
-            prefix_raw  = self.extraction_display[: self.last_block_pos]
-
-            if prefix_raw:
-                prefix = prefix_raw.rstrip("\n") + "\n"
-                sep ="-" * 100 + "\n\n"
+            block=f"Query: {self.query_input.text().strip()}\n\nExtracted Legal Info:\n{body}"
 
-            else:
-                prefix = ""
-                sep    = ""
-                
-
-            block=f"{sep}Query: {self.query_input.text().strip()}\n\nExtracted Legal Info:\n{body}"
-            
-            self.extraction_display = prefix + block
-            self.results_text.setPlainText(self.extraction_display)
-            
-            # update block start for further replaces
-            self.last_block_pos = len(prefix)
+            # Swap the rejected chunk for the next one in place
+            self.replace_extraction_block(block)
             self.confirm_widget.show()
             
         else:
-            self.results_text.setPlainText(self.extraction_display)
-            self.results_text.append(
+            # The extraction text is already on screen; just add the note under it
+            self.extract_text.append(
                 '<p style="margin:0; color:red;">'
                 'No more results, please try a different query'
                 '</p>'
@@ -671,7 +813,7 @@ class SystemGUI(QMainWindow):
 
         if self.mode == "Full Article":
             subsec_int = int(self.subsec_input.text().strip())
-            subsec_word = num2words(subsec_int, to='cardinal', lang='en')
+            subsec_word = _subsec_word(subsec_int)
 
         else:
             subsec_word = ''
@@ -682,6 +824,7 @@ class SystemGUI(QMainWindow):
             QMessageBox.warning(self, "Invalid input", "Please fill in the inputs")
             return
 
+        self.load_agents()
         approved = self.retrieval_agent.get_confirmed()
         snippets = "\n".join(item["chunk"] for item in approved)
 
@@ -690,15 +833,17 @@ class SystemGUI(QMainWindow):
         self.topic_input.setEnabled(False)
         self.subsec_input.setEnabled(False)
 
+        # Show the new block's heading now; streamed text is appended under it as it arrives
+        self.show_generation_preview()
+
         self.worker = GenerateWorker(self.content_agent, snippets, self.mode, topic, subsec_word)
-        self.worker.progress.connect(lambda a, m: self.start_spinner(f"Incomplete answer. Retrying ({a}/{m})"))
+        self.worker.progress.connect(self.generate_retry)
+        self.worker.chunk.connect(self.append_generated)
         self.worker.finished.connect(self.generate_finished)
         self.worker.start()
-        
 
-    def generate_finished(self, output):
-        
-        self.stop_spinner()
+
+    def generation_header(self):
 
         title = ""
 
@@ -710,20 +855,46 @@ class SystemGUI(QMainWindow):
 
         else:
             title = 'Article'
-            
+
+        return f"------------------- Final {title} ---------------------- \n\n"
+
+
+    def show_generation_preview(self):
+
+        # Start the block of the generation in progress with its heading
+        cursor = self.end_cursor(self.generate_text)
+        self.generation_mark = self.make_mark(cursor)
+        cursor.insertText(self.generation_header())
+
+
+    def append_generated(self, delta):
+
+        # Append streamed text at the end of the document instead of re-setting the whole text
+        self.end_cursor(self.generate_text).insertText(delta)
+        self.generate_text.verticalScrollBar().setValue(self.generate_text.verticalScrollBar().maximum())
+
+
+    def generate_retry(self, attempt, max_attempts):
+
+        # The answer stopped mid-sentence and is being continued; the streamed text stays
+        self.start_spinner(f"Incomplete answer. Continuing ({attempt}/{max_attempts})")
+
+
+    def generate_finished(self, output):
+        
+        self.stop_spinner()
 
         block = (
-            f"------------------- Final {title} ---------------------- \n\n"
+            f"{self.generation_header()}"
             f"{output}"
             f"\n\n"
         )
-        
-        self.generation_display += block
 
-        if self.topic_input.isVisible():
-            self.results_text.setPlainText(self.generation_display)
-        else:
-            pass
+        # Swap the streamed text for the final output
+        cursor = self.end_cursor(self.generate_text)
+        cursor.setPosition(self.generation_mark.position(), QTextCursor.KeepAnchor)
+        cursor.insertText(block)
+        self.generation_mark = None
 
         self.mode_combo.setEnabled(True)
         self.topic_input.setEnabled(True)
@@ -1,17 +1,26 @@
+from collections import namedtuple
+
 from PySide6.QtCore import QThread, Signal
 
+# Minimal message object for the ContentAgent hooks, which only read `.content`
+Message = namedtuple("Message", ["content"])
+
 class GenerateWorker(QThread):
 
-        """
+    """
     QThread subclass that runs the ContentAgent’s generation process in a separate thread.
     Emits:
+      - chunk(str): newly generated text, in small batches while the model is decoding.
       - finished(str): when generation is complete, passes the generated text.
-      - progress(int, int): to indicate a retry attempt (current_attempt, max_attempts).
+      - progress(int, int): to indicate a continuation attempt (current_attempt, max_attempts).
     """
 
+    chunk = Signal(str) # Signal emitted with each batch of streamed text
     finished = Signal(str) # Signal emitted when generation finishes
     progress = Signal(int, int) # Signal emitted to report progress
 
+    STREAM_BATCH = 4   # streamed pieces per chunk signal, so the UI thread is not flooded with tiny updates
+
     def __init__(self, content_agent, snippets, mode, topic, max_subsec):
 
         """
@@ -43,24 +52,37 @@ class GenerateWorker(QThread):
         self.content_agent.set_generation_params(self.mode, self.topic, self.max_subsec)
         
         max_attempts = 3
-        output = ""
 
-        # Retry loop: try up to max_attempts times to get an output ending in a period
+        # Hand the confirmed snippets to the ContentAgent (a no-op when they are unchanged since the last run)
+        self.content_agent.set_snippets(self.snippets)
+
+        # Generate text piece by piece, forwarding it to the GUI in small batches as it arrives
+        pieces = []
+        pending = []
+        for piece in self.content_agent.stream_user_message(Message(None)):
+            pieces.append(piece)
+            pending.append(piece)
+            if len(pending) >= self.STREAM_BATCH:
+                self.chunk.emit("".join(pending))
+                pending.clear()
+        if pending:
+            self.chunk.emit("".join(pending))
+
+        output = "".join(pieces)
+
+        # An answer cut off before its final period is continued for a few tokens at a time
+        # (reusing the KV cache) rather than regenerated from the prompt
         for attempt in range(1, max_attempts+1):
-
-            # Send the retrieved snippets as a "system" message to the ContentAgent
-            self.content_agent.on_system_message(type("M",(),{"content":self.snippets}))
-
-            # Trigger the ContentAgent’s on_user_message to generate text.
-            resp = self.content_agent.on_user_message(type("M",(),{"content":None}))
-
-            # Extract the generated text
-            output = resp["content"]
-
             if output.strip().endswith("."):
                 break
-            else:
-                self.progress.emit(attempt+1, max_attempts)
+
+            self.progress.emit(attempt, max_attempts)
+            extra = self.content_agent.continue_generation()
+            if not extra:
+                break
+
+            self.chunk.emit(extra)
+            output += extra
 
 
         self.finished.emit(output)
@@ -1,10 +1,122 @@
 import os
 import json
+import math
+import hashlib
 import pickle
+import warnings
 import numpy as np
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 
+try:
+    import orjson   # Rust JSON parser, decodes UTF-8 bytes directly
+except ImportError:   # orjson is optional: load_and_flatten falls back to json.load
+    orjson = None
+
+try:
+    import onnxruntime
+except ImportError:   # ONNX Runtime is optional: queries are then embedded through PyTorch
+    onnxruntime = None
+
+# Line prefixes that flatten_content treats as bullets and as headings
+_BULLETS = ("•", "-")
+_HEADINGS = ("Section:", "Subsection:")
+
+# Version of load_and_flatten's per-file cache. Bump it whenever flatten_content / process_list
+# or the cached metadata change, so files flattened by older code are parsed again
+FLATTEN_CACHE_VERSION = 1
+
+
+def _configure_torch_threads():
+
+    """
+    Cap PyTorch's intra-op threads at 8 (more mostly adds contention for these small batches),
+    and on CPU-only machines use a single inter-op thread so the two pools don't oversubscribe the cores.
+    """
+
+    torch.set_num_threads(min(8, os.cpu_count() or 1))
+    if not torch.cuda.is_available():
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass   # only settable before the first parallel op; another module already ran one
+
+_configure_torch_threads()
+
+
+class MappedStrings:
+
+    """
+    Read-only sequence of strings stored as one UTF-8 byte buffer plus an offsets array.
+    Both are .npy files opened with mmap_mode="r", so loading is instant and the OS only
+    pages in the strings that are actually read; each string is decoded on access.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data          # uint8 array: every string's UTF-8 bytes, back to back
+        self.offsets = offsets    # int64 array of len(strings) + 1: string i is data[offsets[i]:offsets[i+1]]
+
+    @staticmethod
+    def offsets_path(path):
+        return os.path.splitext(path)[0] + ".offsets.npy"
+
+    @classmethod
+    def save(cls, path, strings):
+
+        """
+        Write `strings` to `path` (the byte buffer) and the offsets file next to it.
+        Args:
+            path (str): Destination .npy path.
+            strings (list of str): The strings to store.
+        """
+
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        np.save(path, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(cls.offsets_path(path), offsets)
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode="r"), np.load(cls.offsets_path(path), mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string index out of range")
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def _save_strings(path, strings):
+
+    # .npy paths use the memory-mapped layout; anything else (e.g. .pkl) is pickled as before
+    if path.endswith(".npy"):
+        MappedStrings.save(path, strings)
+    else:
+        with open(path, 'wb') as f:
+            pickle.dump(strings, f)
+
+
+def _load_strings(path):
+
+    if path.endswith(".npy"):
+        if os.path.exists(path):
+            return MappedStrings.load(path)
+        # Index built before the .npy layout: read the pickle saved next to it
+        path = os.path.splitext(path)[0] + ".pkl"
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
 
 class LegalKnowledgeIndexer:
 
@@ -13,10 +125,12 @@ class LegalKnowledgeIndexer:
 
     """
 
-    def __init__(self, model_name = "all-MiniLM-L12-v2", index_path = None, chunks_path=None, id_meta_path = None):
+    def __init__(self, model_name = "all-MiniLM-L12-v2", index_path = None, chunks_path=None, id_meta_path = None,
+                 index_type = "ivfpq", nprobe = 8, pq_m = 16, hnsw_m = 32, ef_construction = 100, ef_search = 64,
+                 json_dir = "./legal resources/json_files2"):
 
             # Directory containing JSON files of structured chunks
-            self.json_dir = r"C:\Users\User\OneDrive\Documents\UNI work\SCC\year 4\placement\Final-Project-Code\legal resources\json_files2"
+            self.json_dir = json_dir
 
             # Paths for saving/loading index and metadata
             self.index_path = index_path
@@ -32,72 +146,108 @@ class LegalKnowledgeIndexer:
             self.ids = []
             self.all_chunks = []
 
-            # Load the SentenceTransformer model for embedding text
-            self.model = SentenceTransformer(model_name)
+            # FAISS index settings: "ivfpq" (inverted lists + product quantization),
+            # "hnsw" (graph search over full vectors), "flat" (exact scan) or "flat_fp32" (exact scan, fp32 storage)
+            self.index_type = index_type
+            self.nprobe = nprobe    # number of IVF cells scanned per query
+            self.pq_m = pq_m        # number of PQ sub-quantizers (must divide the embedding dimension)
+            self.hnsw_m = hnsw_m                    # neighbours per node in the HNSW graph
+            self.ef_construction = ef_construction  # HNSW candidate list size while building
+            self.ef_search = ef_search              # HNSW candidate list size per query (recall vs speed)
+
+            # Load the SentenceTransformer model for embedding text, on the GPU when there is one
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.model_name = model_name
+            self.model = SentenceTransformer(model_name, device=device)
+            if device == "cuda":
+                self.model.half()   # fp16 weights: about twice the encoding throughput on the GPU
             self.index = None
 
+            # On CPU, single-query embeddings run through an ONNX Runtime export of the same model,
+            # which skips most of PyTorch's per-call overhead. Loaded by query_encoder() on the first
+            # query, so index builds never pay for the export; False once it turned out to be unavailable
+            self.query_model = None if device == "cpu" and onnxruntime is not None else False
+
+            # Texts per forward pass in embed(); large enough to keep the GPU / SIMD units busy
+            self.batch_size = 64
+
 
     def flatten_content(self, entry):
 
         """
-        Flatten a single JSON “entry” into one string:
+        Flatten a single JSON “entry” into one string, in a single pass over its lines.
+        A blank line is inserted before every line that is not a bullet, and between a
+        heading (Section:/Subsection:) and a bullet that follows it.
         """
         
-        lines = []
+        out_lines = []
+        prev_is_heading = False   # whether the last emitted line is a heading
 
         # Iterate over each content block in this entry
         for block in entry.get("Content", []):
             text = block.get("text", "").strip()
             if text:
-                lines.append(text)
-
-            # Recursively process any nested lists in this block
-            self.process_list(block.get("list", []), depth=0, lines=lines)
-
-        # Now we insert blank lines in out_lines when:
-        #  - A heading (Section:/Subsection:) is followed by a bullet
-        #  - Or any line is followed by a non-bullet
-        out_lines = []
-        for i, ln in enumerate(lines):
-            out_lines.append(ln)
-            if i + 1 < len(lines):
-                next_ln = lines[i + 1]
-                next_is_bullet = next_ln.lstrip().startswith(("•", "-"))
-                is_heading = ln.startswith("Section:") or ln.startswith("Subsection:")
-
-                # If current is a heading and next is a bullet, or next is not a bullet, insert a blank line
-                if (is_heading and next_is_bullet) or (not next_is_bullet):
+                # A non-bullet line (or any line after a heading) is separated by a blank line
+                if out_lines and (prev_is_heading or not text.startswith(_BULLETS)):
                     out_lines.append("")
+                out_lines.append(text)
+                prev_is_heading = text.startswith(_HEADINGS)
+
+            # Process any nested lists in this block, carrying the heading state across
+            items = block.get("list")
+            if items:
+                prev_is_heading = self.process_list(items, 0, out_lines, prev_is_heading)
 
         return "\n".join(out_lines)
 
 
-    def process_list(self, items, depth, lines):
+    def process_list(self, items, depth, out_lines, prev_is_heading=False):
 
         """
-        Recursively traverse a nested list of items and append their text to `lines`.
+        Traverse a nested list of items depth-first and append their text lines to `out_lines`,
+        inserting blank lines with the same rule as flatten_content. Uses an explicit stack of
+        (iterator, depth) pairs instead of recursion; items are emitted in document order.
         Args:
             items (list of dict): Each dict has "text" and optional nested "list".
             depth (int): Current nesting depth (0 = top-level).
-            lines (list of str): Accumulator list for flattened text lines.
+            out_lines (list of str): Accumulator list for flattened text lines.
+            prev_is_heading (bool): Whether the line before these items is a heading.
+        Returns:
+            bool: Whether the last line appended is a heading.
         """
 
-        for item in items:
+        stack = [(iter(items), depth)]
+        while stack:
+            it, depth = stack[-1]
+            item = next(it, None)
+            if item is None:
+                # This level is exhausted: go back to the parent list
+                stack.pop()
+                continue
+
             raw = item.get("text", "").strip()
             if depth == 0:
                 # Top-level list item: keep raw text
-                lines.append(raw)
+                line = raw
+                is_bullet = raw.startswith(_BULLETS)
 
             else:
                 # Nested list: remove leading “• ”, indent by (depth * 8) spaces, and prefix with “- ”
                 content = raw.lstrip("• ").strip()
-                indent = ' ' * (depth * 8)
-                lines.append(f"{indent}- {content}")
+                line = f"{' ' * (depth * 8)}- {content}"
+                is_bullet = True
+
+            if out_lines and (prev_is_heading or not is_bullet):
+                out_lines.append("")
+            out_lines.append(line)
+            prev_is_heading = depth == 0 and raw.startswith(_HEADINGS)
 
-            # If there is a further nested list under this item, recurse
-            nested = item.get("list", [])
+            # If there is a further nested list under this item, descend into it
+            nested = item.get("list")
             if nested:
-                self.process_list(nested, depth + 1, lines)
+                stack.append((iter(nested), depth + 1))
+
+        return prev_is_heading
                 
 
     def load_and_flatten(self):
@@ -107,20 +257,57 @@ class LegalKnowledgeIndexer:
          - self.file_chunks[filename]: list of flattened chunk strings
          - self.chunk_meta[filename]: list of metadata dicts for each chunk
         The metadata dict contains "section", "subsection", and "topic".
+        Results are cached per file in flattened_chunks/flatten_cache.pkl; a file is only parsed
+        again when its mtime/size changed and its SHA-1 no longer matches the cached one, or when
+        the cache was written with another FLATTEN_CACHE_VERSION.
         """
 
         # Create a directory for any output if needed
         output_dir = os.path.join(self.json_dir, "flattened_chunks")
         os.makedirs(output_dir, exist_ok=True)
 
+        # fname -> (mtime_ns, size, sha1, chunks, meta) from the previous run, if it used the same flattening code
+        cache_path = os.path.join(output_dir, "flatten_cache.pkl")
+        cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                saved = pickle.load(f)
+            if isinstance(saved, dict) and saved.get("version") == FLATTEN_CACHE_VERSION:
+                cache = saved["files"]
+        new_cache = {}
+        changed = False
+
+        # One directory scan gives the names and the stat results used for the cache check
+        entries = sorted((e for e in os.scandir(self.json_dir) if e.name.endswith(".json")), key=lambda e: e.name)
+
         # Iterate over all JSON files sorted alphabetically
-        for file_idx, fname in enumerate(sorted(os.listdir(self.json_dir))):
-            if not fname.endswith(".json"):
+        for dir_entry in entries:
+            fname = dir_entry.name
+            st = dir_entry.stat()
+            cached = cache.get(fname)
+
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                # Unchanged since the last run
+                new_cache[fname] = cached
+                self.file_chunks[fname], self.chunk_meta[fname] = cached[3], cached[4]
+                continue
+
+            with open(dir_entry.path, "rb") as f:
+                raw = f.read()
+            sha1 = hashlib.sha1(raw).hexdigest()
+            changed = True
+
+            if cached is not None and cached[2] == sha1:
+                # Touched but not edited: keep the flattened chunks, record the new mtime
+                new_cache[fname] = (st.st_mtime_ns, st.st_size, sha1, cached[3], cached[4])
+                self.file_chunks[fname], self.chunk_meta[fname] = cached[3], cached[4]
                 continue
 
-            path = os.path.join(self.json_dir, fname)
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            if orjson is not None:
+                # Decode the raw bytes in a single native call
+                data = orjson.loads(raw)
+            else:
+                data = json.loads(raw.decode("utf-8"))
 
             chunks = []
             meta_for_file = []
@@ -139,29 +326,104 @@ class LegalKnowledgeIndexer:
             # Store the flattened chunks and metadata under this filename
             self.file_chunks[fname] = chunks
             self.chunk_meta[fname] = meta_for_file
+            new_cache[fname] = (st.st_mtime_ns, st.st_size, sha1, chunks, meta_for_file)
+
+        # Rewrite the cache only if a file was added, edited or removed
+        if changed or new_cache.keys() != cache.keys():
+            with open(cache_path, "wb") as f:
+                pickle.dump({"version": FLATTEN_CACHE_VERSION, "files": new_cache}, f, protocol=pickle.HIGHEST_PROTOCOL)
             
 
-    def embed(self, texts):
+    def embed(self, texts, validate=False):
 
         """
         Embed a list of text strings into normalized dense vectors using SentenceTransformer.
-        Raises an error if any embedding is not unit-norm or contains NaN/Inf.
         Args:
             texts (list of str): Texts to embed.
+            validate (bool): Check the result with validate_embeddings (done when building the index,
+                             skipped on the query path).
         Returns:
             np.ndarray: 2D array of shape (len(texts), embedding_dim), unit-normalized.
         """
         
-        embs = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        # A single text is a query: use the ONNX encoder when there is one
+        model = self.query_encoder() if len(texts) == 1 else None
+        if model is None:
+            model = self.model
+
+        # inference_mode: no autograd graph or version-counter bookkeeping for the forward passes
+        with torch.inference_mode():
+            embs = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        # fp16 models return float16 vectors; FAISS takes float32
+        embs = embs.astype(np.float32, copy=False)
+        if validate:
+            self.validate_embeddings(embs)
+        return embs
+
+
+    def query_encoder(self):
+
+        """
+        Return the ONNX query encoder, loading (and on first ever use exporting) it on the first call.
+        Returns:
+            SentenceTransformer or None: None when ONNX Runtime is unavailable, on GPU, or if loading failed.
+        """
+
+        if self.query_model is None:
+            try:
+                self.query_model = SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+            except Exception as e:   # sentence-transformers < 3.2 or optimum missing
+                warnings.warn(f"ONNX query encoder unavailable, using PyTorch: {e}", RuntimeWarning)
+                self.query_model = False
+        return None if self.query_model is False else self.query_model
 
-        # shape, norms, nan/inf checks
+
+    def embed_corpus(self, texts):
+
+        """
+        Embed the whole corpus for build_index, sharding the texts across worker processes
+        (one per GPU when there are several, otherwise up to 4 CPU processes).
+        Small corpora and single-GPU machines are embedded in-process with embed().
+        Args:
+            texts (list of str): Texts to embed.
+        Returns:
+            np.ndarray: 2D float32 array of shape (len(texts), embedding_dim), unit-normalized.
+        """
+
+        if torch.cuda.device_count() > 1:
+            devices = [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+        elif not torch.cuda.is_available() and (os.cpu_count() or 1) > 1 and len(texts) >= 16 * self.batch_size:
+            devices = ["cpu"] * min(4, os.cpu_count())
+        else:
+            # Starting worker processes (each loading the model) costs more than it saves here
+            return self.embed(texts, validate=True)
+
+        pool = self.model.start_multi_process_pool(devices)
+        try:
+            embs = self.model.encode_multi_process(texts, pool, batch_size=self.batch_size, normalize_embeddings=True)
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+        embs = embs.astype(np.float32, copy=False)
+        self.validate_embeddings(embs)
+        return embs
+
+
+    def validate_embeddings(self, embs):
+
+        """Raise an error if the embeddings are not 2D or contain NaN/Inf."""
+
+        # shape check, then NaN and Inf in a single pass; no norm check, since
+        # normalize_embeddings=True already gives unit vectors to within fp32 rounding
         assert embs.ndim == 2, f"Embeddings should be 2D, got {embs.ndim}D"
-        norms = np.linalg.norm(embs, axis=1)
-        if not np.allclose(norms, 1.0, atol=1e-6):
-            raise ValueError("Some embeddings deviate from unit norm")
-        if np.any(np.isnan(embs)) or np.any(np.isinf(embs)):
+        if not np.isfinite(embs).all():
             raise ValueError("Invalid values in embeddings")
-        return embs
 
     
     def build_index(self):
@@ -179,46 +441,103 @@ class LegalKnowledgeIndexer:
                 # Create an ID string combining filename and chunk index
                 self.ids.append(f"{fname}_chunk_{i}")
 
-        #Embed all chunks into a 2D array
-        embeddings = self.embed(self.all_chunks)
+        #Embed all chunks into a 2D array (in parallel worker processes for large corpora)
+        embeddings = self.embed_corpus(self.all_chunks)
         dim = embeddings.shape[1]
 
-        #Create a FAISS IndexFlatIP (inner-product) for nearest-neighbor search
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(embeddings)
+        #Create the FAISS index for inner-product nearest-neighbor search
+        self.index = self.make_index(embeddings)
+        self.set_search_params()
 
         # write index and metadata to disk
         if self.index_path:
             faiss.write_index(self.index, self.index_path)
             
         if self.chunks_path:
-            with open(self.chunks_path, 'wb') as f:
-                pickle.dump(self.all_chunks, f)
+            _save_strings(self.chunks_path, self.all_chunks)
                 
         if self.id_meta_path:
-            with open(self.id_meta_path, 'wb') as f:
-                pickle.dump(self.ids, f)
+            _save_strings(self.id_meta_path, self.ids)
                          
         print(f"Built index over {len(self.all_chunks)} chunks.")
 
 
+    def make_index(self, embeddings):
+
+        """
+        Build and fill a FAISS inner-product index for the given embeddings.
+        With index_type="ivfpq", vectors are clustered into ~sqrt(N) IVF cells and compressed
+        with product quantization (pq_m bytes per vector), so a query only scans a few cells.
+        With index_type="hnsw", vectors are linked into an HNSW graph and a query walks it in
+        roughly logarithmic time, keeping full-precision vectors (no training needed).
+        "flat" builds an exhaustive-scan index storing fp16 vectors (IndexScalarQuantizer QT_fp16):
+        half the memory and scan bandwidth of fp32, with inner products accurate to ~1e-3.
+        "ivfpq" also falls back to it when the corpus is too small to train the quantizers well
+        (under 39 * 256 vectors, where PQ also costs noticeable recall) or the dimension is not
+        divisible by pq_m. "flat_fp32" keeps the exact IndexFlatIP.
+        Args:
+            embeddings (np.ndarray): 2D float32 array of unit-normalized vectors.
+        Returns:
+            faiss.Index: The populated index.
+        """
+
+        n, dim = embeddings.shape
+        nlist = max(1, int(math.sqrt(n)))
+
+        # k-means wants ~39 training points per centroid; 8-bit PQ trains 256 centroids per sub-quantizer
+        if self.index_type == "ivfpq" and dim % self.pq_m == 0 and n >= 39 * max(nlist, 256):
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, self.pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings)
+            index.add(embeddings)
+            return index
+
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+            index.add(embeddings)
+            return index
+
+        if self.index_type == "flat_fp32":
+            index = faiss.IndexFlatIP(dim)
+            index.add(embeddings)
+            return index
+
+        # fp16 needs no real training (train() only records the dimension), so this works for any corpus size
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        return index
+
+
+    def set_search_params(self):
+
+        """Apply query-time parameters: nprobe for an IVF index, efSearch for an HNSW index."""
+
+        if isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = self.nprobe
+        elif isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = self.ef_search
+
+
     def load(self):
 
         """
         Load a pre-built FAISS index and associated chunk lists/IDs from disk.
+        Chunk and id files saved as .npy are memory-mapped (MappedStrings) rather than read into lists.
         
         """
 
         if self.index_path:
             self.index = faiss.read_index(self.index_path)
+            self.set_search_params()
 
         if self.chunks_path:
-            with open(self.chunks_path, "rb") as f:
-                self.all_chunks = pickle.load(f)
+            self.all_chunks = _load_strings(self.chunks_path)
 
         if self.id_meta_path:
-            with open(self.id_meta_path, "rb") as f:
-                self.ids = pickle.load(f)
+            self.ids = _load_strings(self.id_meta_path)
+
 
     def query(self, text, top_k = 5):
 
@@ -232,11 +551,55 @@ class LegalKnowledgeIndexer:
             List[ (float, str) ]: Each tuple is (score, chunk_id).
         """
         # Compute a single embedding for the query
-        q_emb = self.embed([text])
+        return self.search(self.embed([text]), top_k)
+
+
+    def search(self, q_emb, top_k = 5):
+
+        """
+        Search the FAISS index with an already computed query embedding.
+
+        Args:
+            q_emb (np.ndarray): float32 array of shape (1, embedding_dim), unit-normalized.
+            top_k (int): Number of nearest neighbors to return.
+        Returns:
+            List[ (float, str) ]: Each tuple is (score, chunk_id).
+        """
         # Search the index: D (scores), I (indices into self.ids)
         D, I = self.index.search(q_emb, top_k)
         # Convert each result to (float_score, chunk_id) using self.ids
-        return [(float(score), self.ids[idx]) for score, idx in zip(D[0], I[0])]
+        # (IVF search pads with -1 when the probed cells hold fewer than top_k vectors)
+        return [(float(score), self.ids[idx]) for score, idx in zip(D[0], I[0]) if idx >= 0]
+
+
+    def query_int(self, text, top_k = 5):
+
+        """
+        Like query(), but return FAISS's integer positions instead of chunk id strings.
+
+        Args:
+            text (str): The query string to embed and search for.
+            top_k (int): Number of nearest neighbors to return.
+        Returns:
+            tuple: (scores, positions) as 1D NumPy arrays; positions index self.ids / self.all_chunks.
+        """
+        return self.search_int(self.embed([text]), top_k)
+
+
+    def search_int(self, q_emb, top_k = 5):
+
+        """
+        Search with an already computed query embedding and return integer positions.
+
+        Args:
+            q_emb (np.ndarray): float32 array of shape (1, embedding_dim), unit-normalized.
+            top_k (int): Number of nearest neighbors to return.
+        Returns:
+            tuple: (scores, positions) as 1D NumPy arrays, without IVF's -1 padding.
+        """
+        D, I = self.index.search(q_emb, top_k)
+        keep = I[0] >= 0
+        return D[0][keep], I[0][keep]
 
 
 
@@ -245,8 +608,8 @@ if __name__ == "__main__":
 
     indexer = LegalKnowledgeIndexer(
         index_path="./legal_chunks.faiss",
-        chunks_path="./legal_chunks.chunks.pkl",
-        id_meta_path="./legal_chunks.ids.pkl"
+        chunks_path="./legal_chunks.chunks.npy",
+        id_meta_path="./legal_chunks.ids.npy"
     )
     indexer.load_and_flatten()
     indexer.build_index()
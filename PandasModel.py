@@ -0,0 +1,47 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class PandasModel(QAbstractTableModel):
+
+    """
+    Read-only table model over a DataFrame, for showing it in a QTableView.
+    Cells are formatted only when the view asks for them (i.e. when they are visible),
+    so no per-cell item objects are built up front.
+    """
+
+    def __init__(self, df, parent=None):
+
+        """
+        Initialize the model.
+        Args:
+            df (pandas.DataFrame): The table to display.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+
+        # Plain object array: cell lookups avoid pandas indexing overhead
+        self._arr = df.to_numpy(dtype=object)
+        self._cols = [str(c) for c in df.columns]
+
+
+    def rowCount(self, parent=QModelIndex()):
+        # Flat table: only the invisible root has children
+        return 0 if parent.isValid() else self._arr.shape[0]
+
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._cols)
+
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(self._arr[index.row(), index.column()])
+
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._cols[section]
+        return str(section + 1)
@@ -0,0 +1,43 @@
+from PySide6.QtCore import QThread, Signal
+
+
+class RetrievalWorker(QThread):
+
+    """
+    QThread subclass that runs a hybrid retrieval off the UI thread.
+    Emits:
+      - finished(chunks): the retrieved text chunks (list of str).
+      - error(error_message)
+    """
+
+    finished = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, retrieve, query, parent=None):
+
+        """
+        Initialize the worker thread.
+        Args:
+            retrieve: Callable taking the query string and returning the retrieved chunks.
+            query (str): The query to retrieve legal information for.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.retrieve = retrieve
+        self.query = query
+
+
+    def run(self):
+
+        """
+        Entry point for the thread: embed the query, search the indexes and emit the chunks.
+
+        """
+        try:
+            chunks = list(self.retrieve(self.query))
+
+        except Exception as e:
+            self.error.emit(f"Could not retrieve legal information:\n{e}")
+            return
+
+        self.finished.emit(chunks)
@@ -1,9 +1,34 @@
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from requests.exceptions import HTTPError, ConnectTimeout
 from PySide6.QtCore import QThread, Signal
 
 
+def query_columns(df):
+
+    """
+    Return the 'query' and 'value' columns of a related-queries result as plain lists.
+    Args:
+        df (pandas.DataFrame | list | dict | None): 'top' or 'rising' result; non-DataFrames are converted.
+    Returns:
+        tuple: (queries, values), both empty when there is no data.
+    """
+
+    if df is None:
+        return [], []
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df)
+    n = len(df)
+    queries = df['query'].tolist() if 'query' in df else [float("nan")] * n
+    values = df['value'].tolist() if 'value' in df else [float("nan")] * n
+    return queries, values
+
+
+def pad(values, n):
+    return values + [float("nan")] * (n - len(values))
+
+
 class TrendsWorker(QThread):
 
     """
@@ -16,31 +41,114 @@ class TrendsWorker(QThread):
     finished = Signal(object, object)
     error = Signal(str)
 
-    def __init__(self, keywords, pytrends, trends, parent=None):
+    def __init__(self, keywords, pytrends, trends_factory, parent=None):
 
         """
         Initialize the worker thread.
         Args:
             keywords (list of str): List of keywords to query.
             pytrends: Initialized pytrends request object for interest_by_region.
-            trends: Initialized pytrends request object for related_queries.
+            trends_factory (callable): Returns a configured trendspy client for related_queries;
+                                       called once per fetch thread.
             parent: Optional parent QObject.
         """
         super().__init__(parent)
         self.keywords = keywords
         self.pytrends = pytrends
-        self.trends = trends
+        self.trends_factory = trends_factory
+
+        # Fetch threads and their clients are kept between runs, so every comparison run by this
+        # (restarted) worker reuses the same HTTP sessions; they are shut down when a run is interrupted
+        self.pool = ThreadPoolExecutor(max_workers=4)
+
+        # Per-thread related_queries clients for the fetch pool (a client's HTTP session isn't thread-safe)
+        self._local = threading.local()
+
+
+    def shutdown_pool(self):
+
+        """Stop the fetch threads (their clients go with them) without waiting for requests in flight."""
+
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+    def thread_trends(self):
+
+        """Return this pool thread's own related_queries client, created on first use."""
+
+        trends = getattr(self._local, "trends", None)
+        if trends is None:
+            trends = self._local.trends = self.trends_factory()
+        return trends
+
+
+    def fetch_related(self, kw):
+
+        """
+        Fetch related queries for one keyword (runs on a pool thread).
+        Returns:
+            dict or None: The 'top' / 'rising' result, or None on a network or HTTP error.
+        """
+
+        if self.isInterruptionRequested():
+            return None
+        try:
+            return self.thread_trends().related_queries(kw)
+
+        # If there is a network or HTTP error, skip this keyword
+        except (HTTPError, ConnectTimeout):
+            return None
+
+        except Exception:
+            return None
+
+
+    def pause(self, seconds):
+
+        """
+        Sleep between requests in short steps so a newer comparison can interrupt the worker.
+        Args:
+            seconds (float): How long to wait.
+        Returns:
+            bool: True if an interruption was requested while waiting.
+        """
+
+        for _ in range(int(seconds * 10)):
+            if self.isInterruptionRequested():
+                return True
+            self.msleep(100)
+        return self.isInterruptionRequested()
   
 
     def run(self):
 
         """
-        Entry point for the thread. 
+        Entry point for the thread. An interrupted run shuts the fetch pool down: the GUI may abandon
+        this worker for a new one, and its idle threads and sessions would otherwise live until exit.
         
         """
+        try:
+            self.compare()
+        finally:
+            if self.isInterruptionRequested():
+                self.shutdown_pool()
+
+
+    def compare(self):
+
+        """Fetch region interest and related queries for self.keywords and emit the result."""
+
+        # Recreate the pool if an earlier, interrupted run shut it down
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=4)
+            self._local = threading.local()
+
         try:
             # Introduce a short sleep to avoid immediate requests
-            time.sleep(5.0)
+            if self.pause(5.0):
+                return
             # Build payload for interest_by_region for all keywords,
             self.pytrends.build_payload(self.keywords, timeframe="today 1-m", geo='GB')
             regiondf = self.pytrends.interest_by_region()
@@ -56,20 +164,32 @@ class TrendsWorker(QThread):
         #Sort regions descending by interest for the first keyword and keep top 10
         top10 = regiondf.sort_values(by=self.keywords[0], ascending=False).head(10)
 
-        frames = []
-
-        #Iterate over each keyword to fetch related queries
+        # Fetch related queries for all keywords concurrently; submissions after the first are
+        # staggered by a second each to stay inside Google Trends' rate limit
+        results = {}
+        futures = {}
+        try:
+            for i, kw in enumerate(self.keywords):
+                if i and self.pause(1.0):
+                    return
+                futures[self.pool.submit(self.fetch_related, kw)] = kw
+
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if self.isInterruptionRequested():
+                    return
+        finally:
+            # Drop fetches that haven't started; ones in flight return and are ignored
+            for future in futures:
+                future.cancel()
+
+        # One list per output column; every keyword's rows are appended and a single DataFrame is built at the end
+        rows = {'keyword': [], 'top query': [], 'top query value': [], 'related query': [], 'related query value': []}
+
+        #Combine the results in keyword order
         for kw in self.keywords:
-            time.sleep(5.0)
-            try:
-                # Fetch related queries for the current keyword
-                result = self.trends.related_queries(kw)
-
-            # If there is a network or HTTP error, skip this keyword
-            except (HTTPError, ConnectTimeout):
-                continue
-                
-            except Exception:
+            result = results.get(kw)
+            if result is None:
                 continue
 
             # Extract 'top' and 'rising' DataFrames from the result
@@ -79,36 +199,22 @@ class TrendsWorker(QThread):
             if (top_df is None or top_df.empty) and (rising_df is None or rising_df.empty):
                     continue
 
-            # Convert lists/dicts to pandas DataFrames if necessary
-            top_df = pd.DataFrame(top_df) if top_df is not None else pd.DataFrame()
-            rising_df = pd.DataFrame(rising_df) if rising_df is not None else pd.DataFrame()
-
-            # Reset indices to ensure alignment
-            top_df = top_df.reset_index(drop=True)
-            rising_df = rising_df.reset_index(drop=True)
-            
-            max_rows = max(len(top_df), len(rising_df))   # Determine the maximum number of rows between top and rising
-            top_df = top_df.reindex(range(max_rows))
-            rising_df = rising_df.reindex(range(max_rows))
-
-            # Rename columns for clarity:
-            top_df    = top_df.rename(columns={
-                'query': 'top query',
-                'value': 'top query value'
-            })
-            rising_df = rising_df.rename(columns={
-                'query': 'related query',
-                'value': 'related query value'
-            })
-
-            # Concatenate the two DataFrames horizontally
-            df_all = pd.concat([top_df, rising_df], axis=1)
-             # Insert a 'keyword' column at position 0 to identify which keyword these rows belong to
-            df_all.insert(0, 'keyword', kw)
-            frames.append(df_all)
-
-        # 6. Concatenate all keyword-specific DataFrames into one big DataFrame, ignoring index
-        allq = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            top_q, top_v = query_columns(top_df)
+            rising_q, rising_v = query_columns(rising_df)
+
+            # Pad the shorter of top / rising with NaN so both fill the same rows
+            max_rows = max(len(top_q), len(rising_q))
+            rows['keyword'] += [kw] * max_rows
+            rows['top query'] += pad(top_q, max_rows)
+            rows['top query value'] += pad(top_v, max_rows)
+            rows['related query'] += pad(rising_q, max_rows)
+            rows['related query value'] += pad(rising_v, max_rows)
+
+        allq = pd.DataFrame(rows) if rows['keyword'] else pd.DataFrame()
+
+        # A newer comparison replaced this one while the last request was in flight
+        if self.isInterruptionRequested():
+            return
 
         #Emit the finished signal with the top10 regions and the combined queries DataFrame
         self.finished.emit(top10, allq)
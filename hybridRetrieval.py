@@ -1,79 +1,185 @@
 from LegalKnowledgeIndexer import LegalKnowledgeIndexer
 from BM25Preprocessor      import BM25Preprocessor
+import os
 import re
+import json
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+import numpy as np
+
+
+class QueryResultCache:
+
+    """
+    Bounded on-disk cache of retrieval results (a single SQLite table), so repeated
+    queries skip embedding, FAISS and BM25 entirely, also across app restarts.
+    When more than max_entries results are stored, the oldest ones are evicted.
+    """
+
+    def __init__(self, path, max_entries=1000):
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+
+        # One connection shared by the retrieval worker threads, serialised by the lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, chunks TEXT)")
+        self._db.commit()
+
+
+    def get(self, key):
+
+        """Return the cached chunk list for `key`, or None."""
+
+        with self._lock:
+            row = self._db.execute("SELECT chunks FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+    def put(self, key, chunks):
+
+        """Store `chunks` under `key`, evicting the oldest entries beyond max_entries."""
+
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results (key, chunks) VALUES (?, ?)", (key, json.dumps(chunks)))
+            # rowid grows with every insert, so the lowest rowids are the oldest results
+            self._db.execute("DELETE FROM results WHERE rowid NOT IN "
+                             "(SELECT rowid FROM results ORDER BY rowid DESC LIMIT ?)", (self.max_entries,))
+            self._db.commit()
 
 
 class HybridRetrieval:
 
     """
     Combines semantic retrieval (via a FAISS index) and BM25 ranking to return the most relevant text chunks for a legal query.
+    The indexes are loaded once per instance and shared by every run(query) call.
     """
 
-    def __init__(self, input_query):
+    # Process-wide instance returned by shared()
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+
+        """Return the process-wide retriever, loading the indexes on first use."""
 
-        self.query = input_query  # Store the query string
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+
+    def __init__(self, cache_path="./.cache/hybrid_results.sqlite", cache_size=1000):
+
+        """
+        Load the semantic and BM25 indexes.
+        Args:
+            cache_path (str | None): SQLite file for the query -> result cache; None disables it.
+            cache_size (int): Maximum number of cached results.
+        """
 
         #Set up Semantic Buffer
         self.sb = LegalKnowledgeIndexer(
             index_path="./legal_chunks.faiss",
-            chunks_path="./legal_chunks.chunks.pkl",
-            id_meta_path="./legal_chunks.ids.pkl"
+            chunks_path="./legal_chunks.chunks.npy",
+            id_meta_path="./legal_chunks.ids.npy"
         )
 
         self.sb.load()  # Load the FAISS index and metadata into memory
 
         #Set up the BM25 preprocessor on the JSON files of chunks:
         self.bm25 = BM25Preprocessor(json_dir="./legal resources/json_files2", k1=1.5, b=0.75)
-        # Build the BM25 index
-        self.bm25.load_and_prepare()
+        # Build the BM25 index, or load it from the cache written by an earlier run
+        self.bm25.load_or_prepare("./legal_chunks.bm25.pkl")
+
+        # Recent query embeddings, keyed by the whitespace-normalised query: a repeated query skips the model
+        self._query_embedding = lru_cache(maxsize=1024)(self._embed_query)
+
+        # Persistent results cache. Keys include the index file's mtime, the BM25 settings and a digest
+        # of the chunk texts, so results computed against an older index or corpus are never returned
+        self.results_cache = QueryResultCache(cache_path, cache_size) if cache_path else None
+        self._index_version = (f"{os.path.getmtime(self.sb.index_path)}:{self.bm25.corpus_digest}:"
+                               f"{self.bm25.k1}:{self.bm25.b}")
 
         
 
-    def run(self, top_k_sem = 5, top_k_bm25 = 3):
+    def run(self, query, top_k_sem = 5, top_k_bm25 = 3, confident_score = 0.92):
 
         """
         Perform hybrid retrieval:
-          1. Fetch top_k_sem semantic hits (chunk IDs + scores) via the FAISS index.
-          2. From those semantic hits, extract their internal integer IDs for BM25.
-          3. Score those candidate IDs with BM25 and return the top_k_bm25 chunks.
+          1. Fetch top_k_sem semantic hits (integer chunk positions + scores) via the FAISS index.
+          2. Score those candidate IDs with BM25 and return the top_k_bm25 chunks.
+        When only one chunk is wanted and the best semantic hit scores at least confident_score
+        (a near-duplicate of the query), that chunk is returned without BM25 reranking.
         Args:
+            query (str): The legal query.
             top_k_sem (int): Number of semantic neighbors to retrieve.
             top_k_bm25 (int): Number of BM25-ranked chunks to return.
+            confident_score (float | None): Cosine similarity above which the top semantic hit is
+                                            returned directly when top_k_bm25 == 1; None disables this.
         Returns:
             List[str]: Cleaned text strings of the top BM25 chunks.
         """
 
-        #Query the semantic index: returns a list of (score, chunk_id) tuples
-        sem_hits = self.sb.query(self.query, top_k=top_k_sem)
+        if self.results_cache is not None:
+            key = self.cache_key(query, top_k_sem, top_k_bm25, confident_score)
+            cached = self.results_cache.get(key)
+            if cached is not None:
+                return cached
+
+        #Query the semantic index. FAISS positions follow the chunk order shared with BM25Preprocessor,
+        #so they are used as BM25 document indices directly (no chunk id strings in between)
+        q_emb = self.query_embedding(query)
+        sem_scores, candidate_int_ids = self.sb.search_int(q_emb, top_k=top_k_sem)
 
-        #Convert each chunk_id (metadata ID) into its integer index inside BM25Preprocessor
-        candidate_int_ids = [self.sb.ids.index(chunk_id) for _, chunk_id in sem_hits]
+        if (top_k_bm25 == 1 and confident_score is not None and len(candidate_int_ids)
+                and sem_scores[0] >= confident_score):
+            # High-confidence semantic match: BM25 would only rerank a near-certain answer
+            result_chunks = [self.bm25.clean_chunks[candidate_int_ids[0]]]
 
-        #Run BM25 scoring on only those candidate document indices
-        bm25_hits = self.bm25.score_subset(self.query, candidate_int_ids, top_k=top_k_bm25)
+        else:
+            #Mark the candidates in a bitmap once, so BM25 membership checks are a byte lookup
+            cand_mask = np.zeros(self.bm25.N, dtype=np.uint8)
+            cand_mask[candidate_int_ids] = 1
 
-        result_chunks = []
-        for doc_id, score in bm25_hits:
-            chunk = self.bm25.raw_chunks[doc_id]
+            #Run BM25 scoring on only those candidate document indices
+            bm25_hits = self.bm25.score_subset(query, cand_mask, top_k=top_k_bm25)
 
-            lines = chunk.splitlines()
-            
-            while lines and lines[0].startswith("Section:"):
-                lines.pop(0)
+            # Chunks were stripped of their "Section:" lines when the BM25 index was prepared
+            result_chunks = [self.bm25.clean_chunks[doc_id] for doc_id, score in bm25_hits]
 
-            
-            clean_chunk = "\n".join(lines).strip()
-            result_chunks.append(clean_chunk)
+        if self.results_cache is not None:
+            self.results_cache.put(key, result_chunks)
 
         return result_chunks
 
 
+    def cache_key(self, query, top_k_sem, top_k_bm25, confident_score=None):
 
+        """Results-cache key: the lowercased, whitespace-collapsed query plus the index version and run() settings."""
 
-    
-        
-    
+        canonical = " ".join(query.lower().split())
+        raw = f"{self._index_version}\x00{top_k_sem}\x00{top_k_bm25}\x00{confident_score}\x00{canonical}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+    def query_embedding(self, query):
+
+        """
+        Return the (cached) semantic embedding of a query.
+        Args:
+            query (str): The query string.
+        Returns:
+            np.ndarray: Read-only float32 array of shape (1, embedding_dim).
+        """
+
+        emb_bytes = self._query_embedding(" ".join(query.split()))
+        return np.frombuffer(emb_bytes, dtype=np.float32).reshape(1, -1)
 
 
-    
+    def _embed_query(self, query):
 
+        # Cached as immutable bytes, so no caller can modify a shared entry in place
+        return self.sb.embed([query]).tobytes()
@@ -1,12 +1,33 @@
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from ConvertPlainTxt import ConvertPlainTxt
 from ConvertToJson import ConvertToJson
 
-def run_preprocessing():
+def _convert_one(job):
+
+    """
+    Convert one .docx file to plain text, parse it and save the JSON
+    (module level so worker processes can run it; each call uses its own converter instances).
+    Args:
+        job (tuple): (source .docx path, output JSON path).
+    Returns:
+        str: The output JSON path.
+    """
+
+    docx_file_path, json_file_path = job
+    plain_txt = ConvertPlainTxt().docx_to_text(docx_file_path)
+    ConvertToJson(docx_file_path).parse_and_save(plain_txt, json_file_path)
+    return json_file_path
+
+
+def run_preprocessing(workers=None):
 
     """
     Traverse the "legal resources" directory, convert each .docx file to plain text,
     then parse that text into JSON and save the result into a "json_files" subdirectory.
+    Args:
+        workers (int | None): Number of worker processes. Use 1 to convert everything in the current process.
     """
 
     # Construct the path to the "legal resources" folder
@@ -16,7 +37,7 @@ def run_preprocessing():
     json_output_dir = os.path.join(root_dir, "json_files2")
     os.makedirs(json_output_dir, exist_ok=True)
 
-    txt_converter = ConvertPlainTxt()
+    docx_files = []   # every .docx path under root_dir
 
     # Walk through every folder, subfolder, and file under root_dir
     for subdir, dirs, files in os.walk(root_dir):
@@ -26,13 +47,37 @@ def run_preprocessing():
                 continue
 
             if file.lower().endswith(".docx"):
-                docx_file_path = os.path.join(subdir, file)
-                json_file_path = os.path.join(json_output_dir, os.path.splitext(file)[0] + ".json")
+                docx_files.append(os.path.join(subdir, file))
+
+    if not docx_files:
+        return
+
+    # Documents are written to one flat folder, so a file name used in several subfolders would make
+    # concurrent workers overwrite the same JSON; those documents are named by their relative path instead
+    name_counts = Counter(os.path.basename(path).lower() for path in docx_files)
+
+    jobs = []   # (docx path, json path) for every document
+    for docx_file_path in docx_files:
+        file = os.path.basename(docx_file_path)
+        if name_counts[file.lower()] > 1:
+            rel = os.path.relpath(docx_file_path, root_dir)
+            file = rel.replace(os.sep, "__")
+            print(f"Duplicate file name {os.path.basename(docx_file_path)!r}: saving {rel} as {file}")
+        json_file_path = os.path.join(json_output_dir, os.path.splitext(file)[0] + ".json")
+        jobs.append((docx_file_path, json_file_path))
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    # Each document is read, converted and saved entirely inside one worker process,
+    # so docx parsing runs in parallel too and no document text crosses process boundaries
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            saved = list(pool.map(_convert_one, jobs, chunksize=4))
+    else:
+        saved = [_convert_one(job) for job in jobs]
 
-                json_parser = ConvertToJson(docx_file_path)
-                plain_txt = txt_converter.docx_to_text(docx_file_path)
-                json_parser.parse_and_save(plain_txt, json_file_path)
-                print(f"Saved JSON to {json_file_path}\n")
+    for json_file_path in saved:
+        print(f"Saved JSON to {json_file_path}\n")
 
 
 if __name__ == "__main__":